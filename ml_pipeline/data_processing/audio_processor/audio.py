@@ -1,35 +1,95 @@
+import subprocess
 import librosa
 import soundfile as sf
 import whisper
 import numpy as np
 from typing import Tuple, Optional
+from .cache import DecodedAudioCache
+
+# ffmpeg decodes this far past max_duration: -t is not sample-exact for compressed inputs, and
+# preprocess()'s strict length check must still see an over-long file as too long
+DECODE_MARGIN = 0.05
 
 class AudioPreprocessor:
     
-    def __init__(self, target_sr: int, min_duration: float, max_duration: float):
+    def __init__(self, target_sr: int, min_duration: float, max_duration: float,
+                 cache: Optional[DecodedAudioCache] = None):
         self.target_sr = target_sr
         self.min_duration = min_duration
         self.max_duration = max_duration
+        self.cache = cache
+    
+    def check_duration(self, audio_path: str) -> Optional[str]:
+        """Reject out-of-range files from the header alone, before decoding any PCM"""
+        # Each file is checked once per run, so the header is read fresh rather than memoised
+        try:
+            info = sf.info(audio_path)
+        except Exception:
+            # Formats libsndfile cannot read (e.g. m4a/aac) are left to the full decode
+            return None
+        
+        duration = info.frames / info.samplerate
+        if duration < self.min_duration:
+            return "too_short"
+        if duration > self.max_duration:
+            return "too_long"
+        return None
+    
+    def _load_audio(self, audio_path: str) -> np.ndarray:
+        """Decoded waveform at target_sr, from the decoded-audio cache when the source is unchanged"""
+        cache_key = self.cache.key(audio_path) if self.cache is not None else None
+        if cache_key is not None:
+            audio = self.cache.get(cache_key)
+            if audio is not None:
+                return audio
+        
+        audio = self._decode(audio_path)
+        if cache_key is not None:
+            self.cache.put(cache_key, audio)
+        return audio
+    
+    def _decode(self, audio_path: str) -> np.ndarray:
+        """whisper.load_audio, but ffmpeg stops decoding just past max_duration"""
+        cmd = [
+            "ffmpeg", "-nostdin", "-threads", "0",
+            "-i", audio_path,
+            "-t", f"{self.max_duration + DECODE_MARGIN:.3f}",
+            "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le",
+            "-ar", str(self.target_sr), "-"
+        ]
+        try:
+            out = subprocess.run(cmd, capture_output=True, check=True).stdout
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
+        
+        return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
     
     def preprocess(self, audio_path: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], str]:
         try:
-            audio = whisper.load_audio(audio_path)
-            duration = len(audio) / 16000
+            # One ffmpeg decode straight to target_sr; Whisper's 16 kHz input is derived from it
+            audio = self._load_audio(audio_path)
+            duration = len(audio) / self.target_sr
             
             if duration < self.min_duration:
                 return None, None, "too_short"
             if duration > self.max_duration:
                 return None, None, "too_long"
             
-            audio = whisper.pad_or_trim(audio)
-            
-            if self.target_sr != 16000:
-                audio_output, _ = librosa.load(audio_path, sr=self.target_sr)
-                audio_output = librosa.util.normalize(audio_output)
+            if self.target_sr != whisper.audio.SAMPLE_RATE:
+                whisper_audio = librosa.resample(audio, orig_sr=self.target_sr,
+                                                 target_sr=whisper.audio.SAMPLE_RATE,
+                                                 res_type="soxr_hq")
+                # Peak from two streaming reductions, no |audio| temporary; the decoded
+                # audio may be a read-only cache mmap, so the scaled copy is the only allocation
+                peak = max(audio.max(), -audio.min())
+                audio_output = audio * np.float32(1.0 / peak) if peak > 0 else audio
             else:
+                whisper_audio = audio
                 audio_output = audio
             
-            return audio, audio_output, "success"
+            whisper_audio = whisper.pad_or_trim(whisper_audio)
+            
+            return whisper_audio, audio_output, "success"
             
         except Exception as e:
             return None, None, f"error: {e}"
\ No newline at end of file
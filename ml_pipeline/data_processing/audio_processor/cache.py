@@ -0,0 +1,153 @@
+"""Content-addressed caches for decoded audio and per-file model outputs"""
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import orjson
+
+
+class ContentCache:
+    """JSON disk cache keyed by a BLAKE2 digest of the audio samples, with an in-memory LRU in front"""
+    
+    suffix = ".json"
+    
+    def __init__(self, cache_dir: Path, namespace: str, max_memory_items: int = 4096):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.namespace = namespace
+        self.max_memory_items = max_memory_items
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+    
+    def key(self, audio: np.ndarray) -> str:
+        """Digest of the namespace (model identity) and the raw audio buffer"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.namespace.encode())
+        digest.update(np.ascontiguousarray(audio).tobytes())
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict]:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        
+        path = self.cache_dir / f"{key}{self.suffix}"
+        if not path.exists():
+            return None
+        
+        try:
+            value = self._load(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        
+        self._remember(key, value)
+        return value
+    
+    def put(self, key: str, value: Dict):
+        path = self.cache_dir / f"{key}{self.suffix}"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        self._dump(tmp_path, value)
+        os.replace(tmp_path, path)
+        self._remember(key, value)
+    
+    def _load(self, path: Path) -> Dict:
+        return orjson.loads(path.read_bytes())
+    
+    def _dump(self, path: Path, value: Dict):
+        path.write_bytes(orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY))
+    
+    def _remember(self, key: str, value: Dict):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+
+class VADCache(ContentCache):
+    """Caches VADAnalyzer outputs; keys change whenever the VAD model version does"""
+    
+    # The 1024-dim embedding is stored as a raw float32 array rather than JSON number text
+    suffix = ".npz"
+    
+    def __init__(self, cache_dir: Path, model_version: str, max_memory_items: int = 4096):
+        super().__init__(cache_dir, f"vad:{model_version}", max_memory_items)
+    
+    def _load(self, path: Path) -> Dict:
+        with np.load(path) as data:
+            value = orjson.loads(data["meta"].tobytes())
+            if "vad_embedding" in data:
+                value["vad_embedding"] = data["vad_embedding"]
+        return value
+    
+    def _dump(self, path: Path, value: Dict):
+        meta = {k: v for k, v in value.items() if k != "vad_embedding"}
+        arrays = {"meta": np.frombuffer(orjson.dumps(meta, option=orjson.OPT_SERIALIZE_NUMPY), np.uint8)}
+        if value.get("vad_embedding") is not None:
+            arrays["vad_embedding"] = np.asarray(value["vad_embedding"], dtype=np.float32)
+        
+        # Write through a handle so np.savez does not append its own .npz to the temp name
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+
+
+class TranscriptionCache(ContentCache):
+    """Caches raw Whisper outputs; keys change with the Whisper model and precision"""
+    
+    def __init__(self, cache_dir: Path, model_name: str, fp16: bool, max_memory_items: int = 4096):
+        super().__init__(cache_dir, f"whisper:{model_name}:fp16={fp16}", max_memory_items)
+
+
+
+
+class DecodedAudioCache:
+    """Caches decoded waveforms as .npy, keyed by source path/size/mtime so unchanged files skip ffmpeg"""
+    
+    def __init__(self, cache_dir: Path, sample_rate: int, max_duration: float,
+                 max_bytes: int = 20 * 1024 ** 3):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.namespace = f"decoded:{sample_rate}:{max_duration}"
+        self.max_bytes = max_bytes
+        self.prune()
+    
+    def key(self, audio_path: str) -> Optional[str]:
+        try:
+            stat = os.stat(audio_path)
+        except OSError:
+            return None
+        
+        ident = f"{self.namespace}:{os.path.abspath(audio_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.blake2b(ident.encode(), digest_size=16).hexdigest()
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        path = self.cache_dir / f"{key}.npy"
+        try:
+            audio = np.load(path, mmap_mode="r")
+            os.utime(path)  # Recency for prune()
+            return audio
+        except (OSError, ValueError):
+            return None
+    
+    def put(self, key: str, audio: np.ndarray):
+        path = self.cache_dir / f"{key}.npy"
+        tmp_path = self.cache_dir / f"{key}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(audio, dtype=np.float32))
+        os.replace(tmp_path, path)
+    
+    def prune(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        with os.scandir(self.cache_dir) as entries:
+            files = [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                     for entry in entries if entry.is_file()]
+        
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -4,6 +4,9 @@ from typing import List, Optional, Dict
 @dataclass
 class ProcessorConfig:
     output_dir: str
+    # Local caches (decoded audio, transcripts, VAD); defaults to "<output_dir>_cache" so they stay
+    # out of the output tree that gets published
+    cache_dir: Optional[str] = None
     input_datasets: Dict[str, str] = field(default_factory=dict) 
     whisper_model: str = "small"
     target_sr: int = 22050
@@ -15,4 +18,7 @@ class ProcessorConfig:
     vad_model_path: str = "emotion_VAD_model"
     vad_model_name: str = "audeering/wav2vec2-large-robust-12-ft-emotion-msp-dim"
     verbose: bool = False
-    progress_interval: int = 10
\ No newline at end of file
+    progress_interval: int = 10
+    num_workers: int = 1
+    transcription_batch_size: int = 16
+    write_csv: bool = False
\ No newline at end of file
@@ -7,7 +7,7 @@ import os
 
 # Import our downloader module functions
 try:
-    from .vad_downloader import ensure_model, get_model_info, check_dependencies
+    from .vad_downloader import ensure_model, get_model_info, check_dependencies, MODEL_VERSION
     DOWNLOADER_AVAILABLE = True
 except ImportError:
     DOWNLOADER_AVAILABLE = False
@@ -25,6 +25,7 @@ class VADAnalyzer:
         self.model_dir = model_dir
         self.cache_dir = cache_dir
         self.verbose = verbose
+        self.model_version = MODEL_VERSION if DOWNLOADER_AVAILABLE else Path(model_dir).name
         
         self.model = None
         self.model_available = False
@@ -85,12 +86,19 @@ class VADAnalyzer:
             if self.verbose:
                 print(f"❌ Fallback model loading failed: {e}")
         
-    def extract(self, audio_path: str) -> Tuple[Optional[Dict], str]:
+    def extract(self, audio_path: Optional[str] = None, audio: Optional[np.ndarray] = None,
+                sample_rate: Optional[int] = None) -> Tuple[Optional[Dict], str]:
+        """Score a file on disk, or an already decoded mono waveform passed as audio/sample_rate"""
         if not self.model_available:
             return None, "vad_model_unavailable"
         
         try:
-            audio_data, sample_rate = torchaudio.load(audio_path)
+            if audio is not None:
+                # Copies only if needed: cached audio arrives as a read-only memory map
+                audio_data = torch.from_numpy(
+                    np.require(audio, dtype=np.float32, requirements=["C", "W"])).unsqueeze(0)
+            else:
+                audio_data, sample_rate = torchaudio.load(audio_path)
             
             if audio_data.shape[0] > 1:
                 audio_data = torch.mean(audio_data, dim=0, keepdim=True)
@@ -120,15 +128,14 @@ class VADAnalyzer:
         
         confidence = float(1.0 / (1.0 + np.std(logits[0])))
         
+        # vad_scores/raw_logits only repeated the three scores above and the embedding shape is
+        # fixed, so they are not stored; the embedding stays a float32 array (no 1024 Python floats)
         return {
             "valence": valence,
             "arousal": arousal, 
             "dominance": dominance,
-            "vad_scores": [valence, arousal, dominance],
-            "vad_embedding": hidden_states[0].tolist(),
-            "confidence": confidence,
-            "raw_logits": logits[0].tolist(),  # Include raw scores for debugging
-            "raw_embeddings_shape": list(hidden_states.shape)
+            "vad_embedding": np.asarray(hidden_states[0], dtype=np.float32),
+            "confidence": confidence
         }
 
     def get_analyzer_info(self) -> Dict:
@@ -1,115 +1,285 @@
-import json
+import base64
+import csv
+import hashlib
+import heapq
+import os
 import time
+import multiprocessing
+from contextlib import ExitStack
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple
 from tqdm import tqdm
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import soundfile as sf
 import random
+import numpy as np
+import orjson
+import torch
 from .config import ProcessorConfig
 from .models import ModelManager
-from .audio import AudioPreprocessor
+from .audio import AudioPreprocessor, DECODE_MARGIN
 from .transcription import Transcriber
 from .emotion import VADAnalyzer
+from .cache import DecodedAudioCache, VADCache, TranscriptionCache
 from .stats import StatsTracker
 
+_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+_worker_processor = None
+
+
+def _init_worker(config: ProcessorConfig, num_threads: int):
+    """Load the models once per worker process"""
+    global _worker_processor
+    # Each worker gets its share of the cores for torch's intra-op pool (STFT, Whisper on CPU)
+    # instead of every process spinning up one thread per core
+    torch.set_num_threads(num_threads)
+    _worker_processor = UniversalAudioProcessor(config)
+
+
+def _process_in_worker(audio_paths: List[Path], dataset_name: str) -> Tuple[List[Dict], Dict]:
+    _worker_processor.stats.reset()
+    results = _worker_processor.process_batch(audio_paths, dataset_name)
+    _worker_processor._drain_writes()
+    return results, _worker_processor.stats.get_summary()
+
+
 class FileManager:   
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, cache_dir: Optional[Path] = None):
         self.output_dir = Path(output_dir)
         self.audio_dir = self.output_dir / "processed_audio"
-        self.transcripts_dir = self.output_dir / "transcripts"
-        self.vad_dir = self.output_dir / "vad_scores"
+        self.annotations_dir = self.output_dir / "annotations"
         self.metadata_dir = self.output_dir / "metadata"
         self.logs_dir = self.output_dir / "logs"
+        self.cache_dir = (Path(cache_dir) if cache_dir is not None
+                          else self.output_dir.with_name(self.output_dir.name + "_cache"))
         
-        for dir_path in [self.audio_dir, self.transcripts_dir,
-                        self.vad_dir, self.metadata_dir, self.logs_dir]:
+        for dir_path in [self.audio_dir, self.annotations_dir,
+                        self.metadata_dir, self.logs_dir, self.cache_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
             
             
     
+    def audio_path(self, file_id: str) -> Path:
+        return self.audio_dir / f"{file_id}.wav"
+    
+    
+    
+    def annotations_path(self, file_id: str) -> Path:
+        return self.annotations_dir / f"{file_id}.json"
+    
+    
+    
     def save_audio(self, file_id: str, audio_data, sample_rate: int) -> Path:
-        path = self.audio_dir / f"{file_id}.wav"
-        sf.write(path, audio_data, sample_rate)
+        path = self.audio_path(file_id)
+        # buffer_write hands the float32 samples to libsndfile as-is (no intermediate copy)
+        samples = np.ascontiguousarray(audio_data, dtype=np.float32)
+        with sf.SoundFile(path, mode='w', samplerate=sample_rate, channels=1,
+                          subtype='PCM_16') as out:
+            out.buffer_write(samples, dtype='float32')
         return path
     
     
     
-    def save_json(self, data: Dict, subdir: str, file_id: str) -> Path:
-        path = getattr(self, f"{subdir}_dir") / f"{file_id}.json"
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    def save_annotations(self, file_id: str, data: Dict) -> Path:
+        """Transcript and VAD scores for one file, combined into a single sidecar"""
+        vad = data.get("vad")
+        if vad and "vad_embedding" in vad:
+            # The 1024-d embedding dominates the sidecar; store it as base64 float16 (decode with
+            # np.frombuffer(base64.b64decode(...), dtype=vad["vad_embedding_dtype"]))
+            embedding = np.asarray(vad["vad_embedding"], dtype=np.float16)
+            data = {**data, "vad": {**vad,
+                                    "vad_embedding": base64.b64encode(embedding.tobytes()).decode("ascii"),
+                                    "vad_embedding_dtype": "float16"}}
+        
+        path = self.annotations_path(file_id)
+        path.write_bytes(orjson.dumps(data, option=_JSON_OPTIONS))
         return path
     
     
 
 class UniversalAudioProcessor:   
+    # Canonical skip status -> stats counter; language filters carry a "_<lang>" suffix
+    _SKIP_MAP = {
+        "too_short": "skipped_too_short",
+        "too_long": "skipped_too_long",
+        "transcript_too_short": "skipped_bad_transcript",
+        "language_filtered": "skipped_language_filter"
+    }
+    
     def __init__(self, config: ProcessorConfig):
         self.config = config
-        self.file_manager = FileManager(config.output_dir)
+        self.file_manager = FileManager(config.output_dir, config.cache_dir)
         self.model_manager = ModelManager(config)
         self.audio_preprocessor = AudioPreprocessor(
-            config.target_sr, config.min_duration, config.max_duration
+            config.target_sr, config.min_duration, config.max_duration,
+            cache=DecodedAudioCache(
+                self.file_manager.cache_dir / "decoded",
+                config.target_sr,
+                # The decode window, so entries cut at a different length are never reused
+                config.max_duration + DECODE_MARGIN
+            )
         )
         self.stats = StatsTracker()
         
-        self.transcriber = Transcriber(
-            self.model_manager.whisper_model,
-            config.min_transcript_length,
-            config.allowed_languages,
-            self.model_manager.device
-        )
+        # Whisper and the VAD model load on first use: with a worker pool, each worker loads its
+        # own copies and the parent never needs them
+        self._transcriber: Optional[Transcriber] = None
+        self._vad_analyzer: Optional[VADAnalyzer] = None
+        self._vad_cache: Optional[VADCache] = None
         
-        self.vad_analyzer = VADAnalyzer(
-            model_dir="vad_model",
-            cache_dir="vad_cache", 
-            auto_download=True,
-            verbose=config.verbose
-        )
+        # Output writes run here so the next file's inference overlaps the previous file's disk flush
+        self._io_pool = ThreadPoolExecutor(max_workers=4)
+        self._pending_writes: List[Tuple[Dict, List[Future]]] = []
+        self._max_pending_writes = 32
             
     
     
+    @property
+    def transcriber(self) -> Transcriber:
+        if self._transcriber is None:
+            self._transcriber = Transcriber(
+                self.model_manager.whisper_model,
+                self.config.min_transcript_length,
+                self.config.allowed_languages,
+                self.model_manager.device,
+                cache=TranscriptionCache(
+                    self.file_manager.cache_dir / "transcripts",
+                    self.config.whisper_model,
+                    fp16=self.model_manager.device != "cpu"
+                )
+            )
+        return self._transcriber
+    
+    
+    
+    @property
+    def vad_analyzer(self) -> VADAnalyzer:
+        if self._vad_analyzer is None:
+            self._vad_analyzer = VADAnalyzer(
+                model_dir="vad_model",
+                cache_dir="vad_cache", 
+                auto_download=True,
+                verbose=self.config.verbose
+            )
+        return self._vad_analyzer
+    
+    
+    
+    @property
+    def vad_cache(self) -> VADCache:
+        if self._vad_cache is None:
+            self._vad_cache = VADCache(
+                self.file_manager.cache_dir / "vad",
+                self.vad_analyzer.model_version
+            )
+        return self._vad_cache
+    
+    
+    
     def process_single_file(self, audio_path: Path, dataset_name: str) -> Dict:
-        file_id = f"{dataset_name}_{audio_path.stem}_{hash(str(audio_path)) % 10000:04d}"
+        """Process one file through the batch path and wait for its outputs to be written"""
+        result = self.process_batch([audio_path], dataset_name)[0]
+        self._drain_writes()
+        return result
+    
+    
+    
+    def process_batch(self, audio_paths: List[Path], dataset_name: str) -> List[Dict]:
+        """Process several files, sharing one batched Whisper decode across them"""
+        file_id_prefix = f"{dataset_name}_"
+        prepared = [self._preprocess_file(audio_path, dataset_name, file_id_prefix)
+                    for audio_path in audio_paths]
+        ready = [i for i, (_, whisper_audio, _) in enumerate(prepared) if whisper_audio is not None]
+        
+        try:
+            transcriptions = self.transcriber.transcribe_batch([prepared[i][1] for i in ready])
+        except Exception as e:
+            transcriptions = [(None, f"unexpected_error: {e}")] * len(ready)
+        
+        for i, (transcription, status) in zip(ready, transcriptions):
+            result, _, processed_audio = prepared[i]
+            self._finish_file(result, processed_audio, transcription, status)
+        
+        return [result for result, _, _ in prepared]
+    
+    
+    
+    def _preprocess_file(self, audio_path: Path, dataset_name: str,
+                         file_id_prefix: str) -> Tuple[Dict, Optional[np.ndarray], Optional[np.ndarray]]:
+        digest = hashlib.blake2b(str(audio_path).encode(), digest_size=4).hexdigest()
+        file_id = file_id_prefix + audio_path.stem + "_" + digest
         
         result = {
             "file_id": file_id,
-            "original_path": Path(audio_path).as_posix(),
+            "original_path": audio_path.as_posix(),
             "dataset": dataset_name,
             "status": "failed",
             "error": None
         }
         
         try:
+            skip_status = self.audio_preprocessor.check_duration(str(audio_path))
+            if skip_status is not None:
+                result["error"] = skip_status
+                self._update_skip_stats(skip_status)
+                return result, None, None
+            
             whisper_audio, processed_audio, status = self.audio_preprocessor.preprocess(str(audio_path))
             if whisper_audio is None:
                 result["error"] = status
                 self._update_skip_stats(status)
-                return result
+                return result, None, None
             
             duration = len(processed_audio) / self.config.target_sr
             self.stats.update("total_duration", duration)
             
-            transcription, status = self.transcriber.transcribe(whisper_audio)
+        except Exception as e:
+            result["error"] = f"unexpected_error: {e}"
+            return result, None, None
+        
+        return result, whisper_audio, processed_audio
+    
+    
+    
+    def _finish_file(self, result: Dict, processed_audio: np.ndarray,
+                     transcription: Optional[Dict], status: str) -> Dict:
+        """VAD analysis and output writes for a transcribed file"""
+        file_id = result["file_id"]
+        
+        try:
             if transcription is None:
                 result["error"] = status
                 self._update_skip_stats(status)
                 return result
             
-            vad_data, _ = self.vad_analyzer.extract(str(audio_path))
+            duration = len(processed_audio) / self.config.target_sr
             
-            audio_path = self.file_manager.save_audio(file_id, processed_audio, self.config.target_sr)
-            transcript_path = self.file_manager.save_json(transcription, "transcripts", file_id)
+            vad_key = self.vad_cache.key(processed_audio)
+            vad_data = self.vad_cache.get(vad_key)
+            if vad_data is None:
+                vad_data, _ = self.vad_analyzer.extract(audio=processed_audio,
+                                                        sample_rate=self.config.target_sr)
+                if vad_data:
+                    self.vad_cache.put(vad_key, vad_data)
             
-            vad_path = None
-            if vad_data:
-                vad_path = self.file_manager.save_json(vad_data, "vad", file_id)
+            audio_path = self.file_manager.audio_path(file_id)
+            annotations_path = self.file_manager.annotations_path(file_id)
+            writes = [
+                self._io_pool.submit(self.file_manager.save_audio, file_id,
+                                     processed_audio, self.config.target_sr),
+                self._io_pool.submit(self.file_manager.save_annotations, file_id,
+                                     {"transcript": transcription, "vad": vad_data or None})
+            ]
             
             result.update({
                 "status": "success",
-                "processed_audio_path": Path(audio_path).as_posix(),
-                "transcript_path": Path(transcript_path).as_posix(),
-                "vad_path": Path(vad_path).as_posix() if vad_path else None,
+                "processed_audio_path": audio_path.as_posix(),
+                "annotations_path": annotations_path.as_posix(),
                 "text": transcription["text"],
                 "language": transcription["language"],
                 "audio_duration": duration,
@@ -127,10 +297,28 @@ class UniversalAudioProcessor:
             self.stats.update("processed_files")
             self.stats.update("processed_duration", duration)
             
+            self._pending_writes.append((result, writes))
+            self._drain_writes(self._max_pending_writes)
+            
         except Exception as e:
             result["error"] = f"unexpected_error: {e}"
             
         return result
+    
+    
+    
+    def _drain_writes(self, max_pending: int = 0):
+        """Wait for queued output writes until at most max_pending remain; failed writes fail their file"""
+        while len(self._pending_writes) > max_pending:
+            result, writes = self._pending_writes.pop(0)
+            try:
+                for future in writes:
+                    future.result()
+            except Exception as e:
+                # failed_files is left to process_dataset, which counts every non-success result once
+                result.update({"status": "failed", "error": f"write_error: {e}"})
+                self.stats.update("processed_files", -1)
+                self.stats.update("processed_duration", -result["audio_duration"])
             
             
     
@@ -143,113 +331,179 @@ class UniversalAudioProcessor:
         if file_extensions is None:
             file_extensions = ['.wav', '.mp3', '.m4a', '.flac', '.aac']
         
-        audio_files = self._find_audio_files(input_dir, file_extensions, recursive)
+        if max_files and random_sample:
+            seed = random_seed if random_seed is not None else int(time.time() * 1000000) % 2**32
+            random.seed(seed)
+            print(f"Using random seed: {seed}")
+            
+            # Keyed on a seeded hash of each relative path, so a seed selects the same files
+            # whatever order the filesystem lists them in
+            def sample_key(path: Path) -> bytes:
+                name = f"{seed}:{os.path.relpath(path, input_dir)}"
+                return hashlib.blake2b(name.encode(), digest_size=8).digest()
+            
+            audio_files = sorted(heapq.nsmallest(
+                max_files, self._find_audio_files(input_dir, file_extensions, recursive), key=sample_key))
+        elif max_files:
+            # The first max_files in sorted order, independent of filesystem listing order,
+            # while holding only max_files paths at a time
+            audio_files = heapq.nsmallest(
+                max_files, self._find_audio_files(input_dir, file_extensions, recursive))
+        else:
+            audio_files = sorted(self._find_audio_files(input_dir, file_extensions, recursive))
         
         if not audio_files:
             print(f"No audio files found in {input_dir}")
             return []
         
-        if max_files and len(audio_files) > max_files:
-            if random_sample:
-                if random_seed is not None:
-                    random.seed(random_seed)
-                    print(f"Using random seed: {random_seed}")
-                else:
-                    seed = int(time.time() * 1000000) % 2**32
-                    random.seed(seed)
-                    print(f"Using random seed: {seed}")
-                
-                audio_files = random.sample(audio_files, max_files)
-            else:
-                audio_files = audio_files[:max_files]
-        
         print(f"\nProcessing {dataset_name}: {len(audio_files)} files")
         
         results = []
+        successful = 0
         start_time = time.time()
         
         with tqdm(total=len(audio_files), desc=dataset_name, 
-                  disable=not self.config.verbose) as pbar:
-            for i, audio_path in enumerate(audio_files):
+                  disable=not self.config.verbose, mininterval=0.5,
+                  miniters=max(1, len(audio_files) // 1000)) as pbar:
+            for i, result in enumerate(self._iter_results(audio_files, dataset_name)):
                 self.stats.update("total_files")
-                result = self.process_single_file(audio_path, dataset_name)
                 results.append(result)
                 
-                if result["status"] != "success":
+                if result["status"] == "success":
+                    successful += 1
+                else:
                     self.stats.update("failed_files")
                 
                 pbar.update(1)
                 
                 if not self.config.verbose and (i + 1) % self.config.progress_interval == 0:
-                    successful = sum(1 for r in results if r["status"] == "success")
                     print(f"  Progress: {i+1}/{len(audio_files)} files, "
                           f"{successful} successful ({successful/(i+1)*100:.1f}%)")
         
         # Save results
         duration = time.time() - start_time
-        self._save_dataset_results(dataset_name, results)
-        self.stats.print_dataset_summary(dataset_name, results, duration, self.config.verbose)
+        # Writes were drained before each result was yielded, so these statuses are final
+        successful = [r for r in results if r["status"] == "success"]
+        self._save_dataset_results(dataset_name, results, successful)
+        self.stats.print_dataset_summary(dataset_name, results, duration, self.config.verbose,
+                                         successful=successful)
+        
+        return successful
+    
+    
+    
+    def _iter_results(self, audio_files: List[Path], dataset_name: str) -> Iterator[Dict]:
+        """Yield per-file results in input order, fanning out to worker processes if configured"""
+        batch_size = max(1, self.config.transcription_batch_size)
+        batches = [audio_files[i:i + batch_size] for i in range(0, len(audio_files), batch_size)]
         
-        return [r for r in results if r["status"] == "success"]
+        # Every worker loads its own Whisper/VAD models, so never start more than there are batches
+        num_workers = min(self.config.num_workers, len(batches))
+        if num_workers <= 1:
+            for batch in batches:
+                results = self.process_batch(batch, dataset_name)
+                # Statuses are final only once the batch's writes have landed
+                self._drain_writes()
+                yield from results
+            return
+        
+        # Spawn keeps CUDA usable in children
+        with ProcessPoolExecutor(max_workers=num_workers,
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(self.config,
+                                           max(1, (os.cpu_count() or 1) // num_workers))) as executor:
+            for batch_results, worker_stats in executor.map(_process_in_worker, batches,
+                                                            repeat(dataset_name)):
+                self.stats.merge(worker_stats)
+                yield from batch_results
     
     
     
     def _find_audio_files(self, input_dir: str, extensions: List[str], 
-                         recursive: bool) -> List[Path]:
-        """Find all audio files in directory"""
+                         recursive: bool) -> Iterator[Path]:
+        """Lazily find audio files in directory (unsorted)"""
         input_path = Path(input_dir)
         if not input_path.exists():
-            return []
+            return iter(())
         
-        audio_files = []
-        for ext in extensions:
-            if recursive:
-                audio_files.extend(input_path.rglob(f"*{ext}"))
-            else:
-                audio_files.extend(input_path.glob(f"*{ext}"))
+        return self._iter_audio_files(input_path, extensions, recursive)
+    
+    
+    
+    @staticmethod
+    def _iter_audio_files(input_path: Path, extensions: List[str],
+                          recursive: bool) -> Iterator[Path]:
+        """Single scandir walk matching every extension at once"""
+        ext_set = {ext.lower() for ext in extensions}
+        stack = [str(input_path)]
         
-        return sorted(audio_files)
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(entry.path)
+                        elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in ext_set:
+                            yield Path(entry.path)
+            except OSError:
+                continue
     
     
     
-    def _save_dataset_results(self, dataset_name: str, results: List[Dict]):
+    def _save_dataset_results(self, dataset_name: str, results: List[Dict],
+                              successful: List[Dict]):
         """Save dataset results"""
-        successful = [r for r in results if r["status"] == "success"]
+        writes = []
         
         if successful:
-            # Save as CSV
+            # Save as Parquet (CSV only on request)
             df = pd.DataFrame(successful)
-            df.to_csv(self.file_manager.metadata_dir / f"{dataset_name}_metadata.csv", 
-                     index=False)
+            writes.append(self._io_pool.submit(
+                df.to_parquet, self.file_manager.metadata_dir / f"{dataset_name}_metadata.parquet",
+                compression="zstd", index=False))
+            if self.config.write_csv:
+                writes.append(self._io_pool.submit(
+                    df.to_csv, self.file_manager.metadata_dir / f"{dataset_name}_metadata.csv",
+                    index=False))
             
             # Save as JSON
-            with open(self.file_manager.metadata_dir / f"{dataset_name}_metadata.json", 
-                     'w', encoding='utf-8') as f:
-                json.dump(successful, f, indent=2, ensure_ascii=False)
+            writes.append(self._io_pool.submit(
+                self._write_json, self.file_manager.metadata_dir / f"{dataset_name}_metadata.json",
+                successful))
         
         # Save all results for debugging
-        with open(self.file_manager.logs_dir / f"{dataset_name}_all_results.json", 
-                 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        writes.append(self._io_pool.submit(
+            self._write_json, self.file_manager.logs_dir / f"{dataset_name}_all_results.json",
+            results))
+        
+        for future in writes:
+            future.result()
+    
+    
+    
+    @staticmethod
+    def _write_json(path: Path, data):
+        path.write_bytes(orjson.dumps(data, option=_JSON_OPTIONS))
             
             
     def _update_skip_stats(self, status: str):
-        if "too_short" in status:
-            self.stats.update("skipped_too_short")
-        elif "too_long" in status:
-            self.stats.update("skipped_too_long")
-        elif "transcript_too_short" in status:
-            self.stats.update("skipped_bad_transcript")
-        elif "language_filtered" in status:
-            self.stats.update("skipped_language_filter")
+        if status.startswith("language_filtered_"):
+            status = "language_filtered"
+        
+        stat = self._SKIP_MAP.get(status)
+        if stat is not None:
+            self.stats.update(stat)
     
     
     def consolidate_all_datasets(self) -> Dict:
         """
-        Consolidate all processed dataset metadata into unified JSON and CSV files.
+        Consolidate all processed dataset metadata into a unified JSON file and a
+        Parquet dataset partitioned by dataset (plus CSV when config.write_csv is set).
         
         Returns:
-            Dict: Consolidated metadata with summary statistics
+            Dict: Consolidation info and per-dataset summaries (rows are streamed to disk, not returned)
         """
         from datetime import datetime
         import datetime as dt
@@ -263,17 +517,19 @@ class UniversalAudioProcessor:
             print("No metadata files found to consolidate.")
             return {}
         
-        all_files = []
         dataset_summaries = []
+        consolidated_files = []
+        fieldnames = {}
+        schemas = []
         total_files = 0
         total_duration = 0.0
         
+        # First pass: summaries, the CSV header and the Parquet schema; rows are not kept in memory
         for metadata_file in metadata_files:
             dataset_name = metadata_file.stem.replace("_metadata", "")
             
             try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    dataset_data = json.load(f)
+                dataset_data = orjson.loads(metadata_file.read_bytes())
                 
                 if not dataset_data:
                     print(f"Warning: Empty metadata file {metadata_file.name}")
@@ -292,8 +548,10 @@ class UniversalAudioProcessor:
                     "success_rate": success_rate
                 })
                 
-                # Add all files to consolidated list
-                all_files.extend(dataset_data)
+                for item in dataset_data:
+                    fieldnames.update(dict.fromkeys(item))
+                schemas.append(pa.Table.from_pylist(dataset_data).schema)
+                consolidated_files.append(metadata_file)
                 total_files += dataset_files
                 total_duration += dataset_duration
                 
@@ -312,24 +570,55 @@ class UniversalAudioProcessor:
                 "total_files": total_files,
                 "total_duration_hours": round(total_duration / 3600, 2)
             },
-            "dataset_summaries": dataset_summaries,
-            "all_files": all_files
+            "dataset_summaries": dataset_summaries
         }
         
-        # Save consolidated JSON
+        # Second pass: stream rows into the consolidated outputs one dataset at a time
         consolidated_json_path = self.file_manager.metadata_dir / "all_datasets_consolidated.json"
-        with open(consolidated_json_path, 'w', encoding='utf-8') as f:
-            json.dump(consolidated_data, f, indent=2, ensure_ascii=False)
-        
-        # Save consolidated CSV (all files)
-        if all_files:
-            consolidated_csv_path = self.file_manager.metadata_dir / "all_datasets_consolidated.csv"
-            df = pd.DataFrame(all_files)
-            df.to_csv(consolidated_csv_path, index=False)
+        consolidated_csv_path = self.file_manager.metadata_dir / "all_datasets_consolidated.csv"
+        consolidated_parquet_path = self.file_manager.metadata_dir / "all_datasets_consolidated"
+        schema = pa.unify_schemas(schemas) if schemas else None
+        
+        with ExitStack() as stack:
+            json_file = stack.enter_context(open(consolidated_json_path, 'wb'))
+            header = orjson.dumps(consolidated_data, option=_JSON_OPTIONS)
+            json_file.write(header[:header.rindex(b"\n}")])
+            json_file.write(b',\n  "all_files": [')
+            
+            writer = None
+            if total_files and self.config.write_csv:
+                csv_file = stack.enter_context(
+                    open(consolidated_csv_path, 'w', encoding='utf-8', newline=''))
+                writer = csv.DictWriter(csv_file, fieldnames=list(fieldnames))
+                writer.writeheader()
             
+            separator = b"\n    "
+            for metadata_file in consolidated_files:
+                dataset_data = orjson.loads(metadata_file.read_bytes())
+                for item in dataset_data:
+                    json_file.write(separator)
+                    json_file.write(orjson.dumps(item, option=orjson.OPT_SERIALIZE_NUMPY))
+                    separator = b",\n    "
+                if writer is not None:
+                    writer.writerows(dataset_data)
+                
+                # Each dataset replaces only its own dataset=<name> partition
+                pq.write_to_dataset(
+                    pa.Table.from_pylist(dataset_data, schema=schema),
+                    consolidated_parquet_path,
+                    partition_cols=["dataset"],
+                    compression="zstd",
+                    existing_data_behavior="delete_matching"
+                )
+            
+            json_file.write(b"\n  ]\n}" if total_files else b"]\n}")
+        
+        if total_files:
             print(f"Consolidated metadata saved:")
             print(f"  JSON: {consolidated_json_path}")
-            print(f"  CSV: {consolidated_csv_path}")
+            print(f"  Parquet: {consolidated_parquet_path}")
+            if self.config.write_csv:
+                print(f"  CSV: {consolidated_csv_path}")
             print(f"  Total: {total_files} files from {len(dataset_summaries)} datasets")
             print(f"  Duration: {total_duration/3600:.2f} hours")
         
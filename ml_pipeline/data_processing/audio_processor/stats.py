@@ -1,5 +1,5 @@
 """Statistics tracking and reporting"""
-from typing import Dict, List
+from typing import Dict, List, Optional
 import pandas as pd
 from datetime import datetime
 
@@ -30,17 +30,25 @@ class StatsTracker:
         if key in self.stats:
             self.stats[key] += value
     
+    def merge(self, other: Dict):
+        """Add numeric statistics collected by another tracker"""
+        for key, value in other.items():
+            if key != "start_time" and key in self.stats and isinstance(value, (int, float)):
+                self.stats[key] += value
+    
     def get_summary(self) -> Dict:
         """Get summary statistics"""
         return self.stats.copy()
     
     def print_dataset_summary(self, dataset_name: str, results: List[Dict], 
-                            duration: float, verbose: bool = True):
+                            duration: float, verbose: bool = True,
+                            successful: Optional[List[Dict]] = None):
         """Print dataset processing summary"""
         if not verbose:
             return
             
-        successful = [r for r in results if r["status"] == "success"]
+        if successful is None:
+            successful = [r for r in results if r["status"] == "success"]
         print(f"\n=== {dataset_name} Complete ===")
         print(f"Processed: {len(successful)}/{len(results)} files")
         print(f"Time: {duration/60:.1f} minutes")
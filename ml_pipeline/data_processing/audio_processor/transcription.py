@@ -1,41 +1,171 @@
 """Transcription module"""
 from typing import Dict, Optional, Tuple, List
+import numpy as np
+import torch
+import whisper
+from .cache import ContentCache
+
+# Same fallback thresholds whisper.transcribe applies to a decoded window
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
 
 class Transcriber:
     """Handles audio transcription"""
     
     def __init__(self, model, min_transcript_length: int, 
-                 allowed_languages: Optional[List[str]], device: str):
+                 allowed_languages: Optional[List[str]], device: str,
+                 cache: Optional[ContentCache] = None):
         self.model = model
         self.min_transcript_length = min_transcript_length
         self.allowed_languages = allowed_languages
         self.device = device
+        self.cache = cache
+        self._stft_window: Optional[torch.Tensor] = None
+        self._mel_basis: Optional[torch.Tensor] = None
     
     def transcribe(self, audio) -> Tuple[Optional[Dict], str]:
         """Transcribe audio"""
         try:
-            result = self.model.transcribe(
-                audio,
-                language=None,
-                word_timestamps=False,
-                fp16=False if self.device == "cpu" else True
-            )
+            cache_key = self.cache.key(audio) if self.cache is not None else None
+            result = self.cache.get(cache_key) if cache_key is not None else None
             
-            text = result["text"].strip()
-            detected_language = result.get("language", "unknown")
+            if result is None:
+                result = self._run_model(audio)
+                if cache_key is not None:
+                    self.cache.put(cache_key, result)
             
-            if len(text) < self.min_transcript_length:
-                return None, "transcript_too_short"
+            return self._filter(result)
+        
+        except Exception as e:
+            return None, f"transcription_error: {e}"
+    
+    def transcribe_batch(self, audios: List) -> List[Tuple[Optional[Dict], str]]:
+        """Transcribe several 30 s windows (as produced by whisper.pad_or_trim) with one batched decode"""
+        results: List[Optional[Dict]] = [None] * len(audios)
+        cache_keys = [None] * len(audios)
+        
+        if self.cache is not None:
+            for i, audio in enumerate(audios):
+                cache_keys[i] = self.cache.key(audio)
+                results[i] = self.cache.get(cache_keys[i])
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        errors: Dict[int, str] = {}
+        
+        if pending:
+            try:
+                decoded = self._run_model_batch([audios[i] for i in pending])
+            except Exception:
+                # A batch-level failure (e.g. out of memory) falls back to one file at a time
+                decoded = [None] * len(pending)
             
-            if self.allowed_languages and detected_language not in self.allowed_languages:
-                return None, f"language_filtered_{detected_language}"
+            for i, result in zip(pending, decoded):
+                try:
+                    results[i] = result if result is not None else self._run_model(audios[i])
+                except Exception as e:
+                    errors[i] = f"transcription_error: {e}"
+                    continue
+                
+                if cache_keys[i] is not None:
+                    self.cache.put(cache_keys[i], results[i])
+        
+        return [(None, errors[i]) if i in errors else self._filter(result)
+                for i, result in enumerate(results)]
+    
+    def _filter(self, result: Dict) -> Tuple[Optional[Dict], str]:
+        text = result["text"].strip()
+        detected_language = result.get("language", "unknown")
+        
+        if len(text) < self.min_transcript_length:
+            return None, "transcript_too_short"
+        
+        if self.allowed_languages and detected_language not in self.allowed_languages:
+            return None, f"language_filtered_{detected_language}"
+        
+        return {
+            "text": text,
+            "language": detected_language,
+            "segments": result.get("segments", []),
+            "no_speech_prob": result.get("no_speech_prob", 0.0)
+        }, "success"
+    
+    def _run_model(self, audio) -> Dict:
+        """Raw Whisper output, before length/language filtering so it can be cached"""
+        result = self.model.transcribe(
+            audio,
+            language=None,
+            word_timestamps=False,
+            fp16=False if self.device == "cpu" else True
+        )
+        return {
+            "text": result["text"],
+            "language": result.get("language", "unknown"),
+            "segments": result.get("segments", []),
+            "no_speech_prob": result.get("no_speech_prob", 0.0)
+        }
+    
+    def _run_model_batch(self, audios: List) -> List[Optional[Dict]]:
+        """Greedy batched decode; None marks windows that need transcribe()'s temperature fallback"""
+        mel = self._log_mel_batch(audios)
+        
+        options = whisper.DecodingOptions(
+            language=None,
+            without_timestamps=True,
+            fp16=False if self.device == "cpu" else True
+        )
+        decoded = whisper.decode(self.model, mel, options)
+        
+        results = []
+        for result in decoded:
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                text = ""
+            elif (result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+                  or result.avg_logprob < LOGPROB_THRESHOLD):
+                results.append(None)
+                continue
+            else:
+                text = result.text
             
-            return {
+            results.append({
                 "text": text,
-                "language": detected_language,
-                "segments": result.get("segments", []),
-                "no_speech_prob": result.get("no_speech_prob", 0.0)
-            }, "success"
-            
-        except Exception as e:
-            return None, f"transcription_error: {e}"
\ No newline at end of file
+                "language": result.language,
+                "segments": [{
+                    "id": 0,
+                    "seek": 0,
+                    "start": 0.0,
+                    "end": float(whisper.audio.CHUNK_LENGTH),
+                    "text": text,
+                    "tokens": result.tokens,
+                    "temperature": result.temperature,
+                    "avg_logprob": result.avg_logprob,
+                    "compression_ratio": result.compression_ratio,
+                    "no_speech_prob": result.no_speech_prob
+                }] if text else [],
+                "no_speech_prob": result.no_speech_prob
+            })
+        
+        return results
+    
+    def _log_mel_batch(self, audios: List) -> torch.Tensor:
+        """whisper.log_mel_spectrogram for a whole batch in one STFT on the model's device"""
+        device = self.model.device
+        batch = torch.from_numpy(np.stack(audios))
+        if device.type == "cuda":
+            batch = batch.pin_memory()
+        batch = batch.to(device, non_blocking=True)
+        
+        # The window and mel filterbank are built once, on the model's device
+        if self._stft_window is None:
+            self._stft_window = torch.hann_window(whisper.audio.N_FFT, device=device)
+            self._mel_basis = whisper.audio.mel_filters(device, self.model.dims.n_mels)
+        
+        stft = torch.stft(batch, whisper.audio.N_FFT, whisper.audio.HOP_LENGTH,
+                          window=self._stft_window, return_complex=True)
+        magnitudes = stft[..., :-1].abs().pow_(2)
+        
+        # In-place from here on: one mel-sized buffer instead of a temporary per step
+        log_spec = (self._mel_basis @ magnitudes).clamp_(min=1e-10).log10_()
+        # Whisper clamps to 80 dB below the peak; the peak must be per window, not per batch
+        torch.maximum(log_spec, log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0, out=log_spec)
+        return log_spec.add_(4.0).div_(4.0)
@@ -8,6 +8,7 @@ import audonnx
 
 
 DEFAULT_MODEL_URL = 'https://zenodo.org/record/6221127/files/w2v2-L-robust-12.6bc4a7fd-1.1.0.zip'
+MODEL_VERSION = Path(DEFAULT_MODEL_URL).stem
 DEFAULT_MODEL_DIR = 'vad_model'
 DEFAULT_CACHE_DIR = 'vad_cache'
 
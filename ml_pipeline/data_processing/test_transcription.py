@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Transcription Test Script
+Checks the batched log-mel front end against whisper.log_mel_spectrogram.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+import whisper
+
+# Add data_processing to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from audio_processor.transcription import Transcriber
+
+
+def make_transcriber(n_mels: int = 80) -> Transcriber:
+    """Transcriber around a stand-in model exposing only what _log_mel_batch reads."""
+    model = SimpleNamespace(device=torch.device("cpu"), dims=SimpleNamespace(n_mels=n_mels))
+    return Transcriber(model, min_transcript_length=0, allowed_languages=None, device="cpu")
+
+
+def test_log_mel_batch_matches_whisper():
+    """Each window of the batch must match whisper's own log-mel, including a silent one."""
+    rng = np.random.default_rng(0)
+    t = np.arange(whisper.audio.SAMPLE_RATE * 5) / whisper.audio.SAMPLE_RATE
+
+    windows = [
+        whisper.pad_or_trim(rng.standard_normal(whisper.audio.N_SAMPLES).astype(np.float32) * 0.5),
+        whisper.pad_or_trim((0.1 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)),
+        # Silent: the 80 dB floor must come from this window's own peak, not the batch's
+        np.zeros(whisper.audio.N_SAMPLES, dtype=np.float32),
+    ]
+
+    batch = make_transcriber()._log_mel_batch(windows)
+
+    assert batch.shape[0] == len(windows)
+    for window, log_mel in zip(windows, batch):
+        expected = whisper.log_mel_spectrogram(window, n_mels=80)
+        torch.testing.assert_close(log_mel, expected, atol=1e-4, rtol=1e-4)
+
+
+if __name__ == "__main__":
+    test_log_mel_batch_matches_whisper()
+    print("✓ _log_mel_batch matches whisper.log_mel_spectrogram")
@@ -9,26 +9,40 @@ class ValenceArousalAdapter(BaseAdapter):
         # Valence-arousal input layer (2 inputs: valence, arousal)
         self.va_encoder = nn.Sequential(
             nn.Linear(2, emotion_dim),
-            nn.ReLU(),
+            nn.ReLU(inplace=True),
             nn.Linear(emotion_dim, emotion_dim)
         )
 
         self.gpt_latent_transform = nn.Sequential(
             nn.Linear(latent_dim + emotion_dim, latent_dim),
-            nn.ReLU(),
+            nn.ReLU(inplace=True),
             nn.Linear(latent_dim, latent_dim),
             nn.Tanh()
         )
 
         self.speaker_embed_transform = nn.Sequential(
             nn.Linear(512 + emotion_dim, 512),
-            nn.ReLU(),
+            nn.ReLU(inplace=True),
             nn.Linear(512, 512),
             nn.Tanh()
         )
 
         self.emotion_gate = nn.Parameter(torch.tensor(0.3))
 
+    @staticmethod
+    def pack_valence_arousal(valence, arousal, device):
+        """[batch, 2] adapter input built on the host and uploaded with a single copy"""
+        if not isinstance(valence, torch.Tensor) and not isinstance(arousal, torch.Tensor):
+            va_input = torch.tensor([[valence, arousal]], dtype=torch.float32)
+            if device.type == 'cuda':
+                va_input = va_input.pin_memory()
+            return va_input.to(device, non_blocking=True)
+
+        valence = torch.as_tensor(valence, dtype=torch.float32)
+        arousal = torch.as_tensor(arousal, dtype=torch.float32, device=valence.device)
+        va_input = torch.stack([valence.reshape(-1), arousal.reshape(-1)], dim=1)
+        return va_input if va_input.device == device else va_input.to(device, non_blocking=True)
+
     def forward(self, gpt_cond_latent, speaker_embedding, valence, arousal):
         device = gpt_cond_latent.device
 
@@ -49,26 +63,13 @@ class ValenceArousalAdapter(BaseAdapter):
         elif speaker_embedding.dim() == 1:
             speaker_embedding = speaker_embedding.unsqueeze(0)
 
-        if not isinstance(valence, torch.Tensor):
-            valence = torch.tensor(valence, dtype=torch.float32, device=device)
-        else:
-            valence = valence.to(device)
-
-        if not isinstance(arousal, torch.Tensor):
-            arousal = torch.tensor(arousal, dtype=torch.float32, device=device)
-        else:
-            arousal = arousal.to(device)
-
-        speaker_embedding = speaker_embedding.to(device)
+        va_input = self.pack_valence_arousal(valence, arousal, device)  # [batch_size, 2]
 
-        if valence.dim() == 0:
-            valence = valence.unsqueeze(0)
-        if arousal.dim() == 0:
-            arousal = arousal.unsqueeze(0)
+        if speaker_embedding.device != device:
+            speaker_embedding = speaker_embedding.to(device, non_blocking=True)
 
-        batch_size = valence.shape[0]
+        batch_size = va_input.shape[0]
 
-        va_input = torch.stack([valence, arousal], dim=1)  # [batch_size, 2]
         emotion_emb = self.va_encoder(va_input)  # [batch_size, emotion_dim]
 
         if gpt_cond_latent.shape[0] != batch_size:
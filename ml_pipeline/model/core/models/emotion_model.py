@@ -2,7 +2,10 @@ import torch
 import torch.nn as nn
 import tempfile
 import os
+import hashlib
+import itertools
 import torchaudio
+from collections import OrderedDict
 from TTS.tts.layers.xtts.dvae import DiscreteVAE
 from TTS.tts.layers.tortoise.arch_utils import TorchMelSpectrogram
 from model.core.adapters.valence_arousal_adapter import ValenceArousalAdapter
@@ -10,8 +13,35 @@ from model.utils.device_utils import *
 from model.utils.model_utils import *
 
 
+# Cross-entropy's default ignore_index, so padded token positions drop out of the loss
+DVAE_PAD_TOKEN = -100
+
+
+def _with_eager_fallback(compiled, eager, name):
+    """Call `compiled`, switching to `eager` for good if torch.compile fails on it.
+
+    Only compiler errors are caught, and only for this callable (unlike dynamo's process-wide
+    suppress_errors); errors raised by the model code itself still propagate.
+    """
+    import torch._dynamo.exc
+
+    state = {'fn': compiled}
+
+    def call(*args, **kwargs):
+        if state['fn'] is eager:
+            return eager(*args, **kwargs)
+        try:
+            return compiled(*args, **kwargs)
+        except torch._dynamo.exc.TorchDynamoException as e:
+            print(f"⚠️  torch.compile failed for {name}, running eagerly: {e}")
+            state['fn'] = eager
+            return eager(*args, **kwargs)
+
+    return call
+
+
 class ValenceArousalXTTS(nn.Module):
-    def __init__(self, config_path=None, checkpoint_path=None, local_model_dir="./models/xtts_v2"):
+    def __init__(self, config_path=None, checkpoint_path=None, local_model_dir="./models/xtts_v2", device=None):
         super().__init__()
 
         self.local_model_dir = local_model_dir
@@ -52,7 +82,18 @@ class ValenceArousalXTTS(nn.Module):
 
         self.dvae = None
         self.mel_converter = None
-        self._init_dvae_and_mel_converter()
+        self._init_dvae_and_mel_converter(device)
+
+        # Component devices are recorded here and in to(), so status lookups never walk parameters
+        self.primary_device = torch.device('cpu')
+        self.dvae_device = next(self.dvae.parameters()).device if self.dvae is not None else None
+        self.mel_device = self.dvae_device
+        self._xtts_device = torch.device('cpu')
+        self._va_adapter_device = torch.device('cpu')
+
+        self._resamplers = {}
+        self._cond_cache = OrderedDict()
+        self.cond_cache_size = 32
 
         print("ValenceArousalXTTS initialization complete!")
 
@@ -65,9 +106,11 @@ class ValenceArousalXTTS(nn.Module):
 
         if hasattr(self, 'xtts'):
             self.xtts = move_model_to_device(self.xtts, device)
+            self._xtts_device = next(self.xtts.parameters()).device
 
         if hasattr(self, 'va_adapter'):
             self.va_adapter = self.va_adapter.to(device)
+            self._va_adapter_device = next(self.va_adapter.parameters()).device
 
         # Handle DVAE with potential CPU fallback for MPS
         if hasattr(self, 'dvae') and self.dvae is not None:
@@ -83,19 +126,12 @@ class ValenceArousalXTTS(nn.Module):
                 else:
                     raise e
 
-        # Handle mel converter with potential CPU fallback for MPS
+        # The mel converter follows the DVAE so mels are produced where they are consumed
         if hasattr(self, 'mel_converter') and self.mel_converter is not None:
-            try:
-                self.mel_converter = self.mel_converter.to(device)
-                self.mel_device = device
-                print(f"✅ Mel converter on {device}")
-            except Exception as e:
-                if str(device).startswith('mps'):
-                    print(f"⚠️  Mel converter incompatible with MPS, using CPU fallback: {e}")
-                    self.mel_converter = self.mel_converter.to(torch.device('cpu'))
-                    self.mel_device = torch.device('cpu')
-                else:
-                    raise e
+            mel_device = getattr(self, 'dvae_device', None) or device
+            self.mel_converter = self.mel_converter.to(mel_device)
+            self.mel_device = mel_device
+            print(f"✅ Mel converter on {mel_device}")
 
         return self
 
@@ -128,11 +164,17 @@ class ValenceArousalXTTS(nn.Module):
             "primary_device": str(self.primary_device),
             "dvae_device": str(self.dvae_device) if self.dvae_device else None,
             "mel_device": str(self.mel_device) if self.mel_device else None,
-            "xtts_device": str(next(self.xtts.parameters()).device) if hasattr(self, 'xtts') else None,
-            "adapter_device": str(next(self.va_adapter.parameters()).device) if hasattr(self, 'va_adapter') else None
+            "xtts_device": str(self._xtts_device),
+            "adapter_device": str(self._va_adapter_device)
         }
 
-    def _init_dvae_and_mel_converter(self):
+    def _init_dvae_and_mel_converter(self, device=None):
+        """Build the DVAE on `device` (when known) and load its weights straight there"""
+        device = torch.device(device) if device is not None else torch.device('cpu')
+        if device.type == 'mps':
+            # to() decides whether the DVAE can actually run on MPS
+            device = torch.device('cpu')
+
         try:
             dvae_path = os.path.join(self.local_model_dir, "dvae.pth")
             mel_stats_path = os.path.join(self.local_model_dir, "mel_stats.pth")
@@ -145,19 +187,20 @@ class ValenceArousalXTTS(nn.Module):
                 print(f"Error: mel_stats.pth not found at {mel_stats_path}")
                 return
 
-            self.dvae = DiscreteVAE(
-                channels=80, normalization=None, positional_dims=1, num_tokens=1024,
-                codebook_dim=512, hidden_dim=512, num_resnet_blocks=3, kernel_size=3,
-                num_layers=2, use_transposed_convs=False,
-            )
+            with device:
+                self.dvae = DiscreteVAE(
+                    channels=80, normalization=None, positional_dims=1, num_tokens=1024,
+                    codebook_dim=512, hidden_dim=512, num_resnet_blocks=3, kernel_size=3,
+                    num_layers=2, use_transposed_convs=False,
+                )
 
-            self.dvae.load_state_dict(torch.load(dvae_path, map_location='cpu'), strict=False)
+            self.dvae.load_state_dict(torch.load(dvae_path, map_location=device, weights_only=True), strict=False)
             self.dvae.eval()
 
             self.mel_converter = TorchMelSpectrogram(
                 mel_norm_file=mel_stats_path,
                 sampling_rate=22050
-            )
+            ).to(device)
 
             print("✅ DVAE and mel converter initialized successfully")
 
@@ -171,11 +214,13 @@ class ValenceArousalXTTS(nn.Module):
             if self.dvae is None or self.mel_converter is None:
                 raise RuntimeError("DVAE or mel converter not initialized. Check dvae.pth and mel_stats.pth paths.")
 
-            device = next(self.parameters()).device
+            # Mel converter and DVAE share a device; the audio goes straight there
+            device = next(self.dvae.parameters()).device
 
             if audio_tensor.dim() == 1:
                 audio_tensor = audio_tensor.unsqueeze(0)  # Add channel dim
-            audio_tensor = audio_tensor.to(device)
+            if audio_tensor.device != device:
+                audio_tensor = audio_tensor.to(device, non_blocking=True)
 
             mel = self.mel_converter(audio_tensor.unsqueeze(0))  # Add batch dim for mel converter
 
@@ -192,71 +237,130 @@ class ValenceArousalXTTS(nn.Module):
             return None
 
     def extract_dvae_tokens_batch(self, audio_batch):
+        """DVAE tokens for a list of waveforms from one padded mel + DVAE forward pass.
+
+        Returns a (B, T_max) token tensor padded with DVAE_PAD_TOKEN and the per-sample token lengths.
+        """
         try:
             if self.dvae is None or self.mel_converter is None:
                 raise RuntimeError("DVAE or mel converter not initialized. Check dvae.pth and mel_stats.pth paths.")
 
-            tokens_list = []
-            failed_samples = []
+            device = next(self.dvae.parameters()).device
+
+            audio_batch = [audio.reshape(-1) for audio in audio_batch]
+            lengths = [audio.numel() for audio in audio_batch]
 
+            padded = torch.zeros(len(audio_batch), max(lengths), device=device)
             for i, audio in enumerate(audio_batch):
-                tokens = self.extract_dvae_tokens(audio)
-                if tokens is not None:
-                    tokens_list.append(tokens)
-                else:
-                    failed_samples.append(i)
+                padded[i, :lengths[i]] = audio
+
+            mel = self.mel_converter(padded)
+            mel = mel[:, :, :mel.shape[-1] - mel.shape[-1] % 4]
+
+            with torch.no_grad():
+                tokens = self.dvae.get_codebook_indices(mel)
 
-            if failed_samples:
-                raise ValueError(f"Token extraction failed for samples: {failed_samples}. Cannot train with incomplete ground truth.")
+            # The centered STFT gives length // hop + 1 frames, which the DVAE downsamples by 4
+            hop_length = self.mel_converter.hop_length
+            token_lengths = torch.tensor(
+                [(length // hop_length + 1) // 4 for length in lengths], device=tokens.device
+            ).clamp_(max=tokens.shape[1])
 
-            return tokens_list
+            # Already one (B, T_max) tensor: mark each sample's tail as padding in place
+            padding = torch.arange(tokens.shape[1], device=tokens.device) >= token_lengths.unsqueeze(1)
+            tokens.masked_fill_(padding, DVAE_PAD_TOKEN)
+            return tokens, token_lengths
 
         except Exception as e:
             print(f"CRITICAL: Batch token extraction failed: {e}")
             raise e
 
     def get_conditioning_latents_with_valence_arousal(self, audio_input, valence, arousal, training=False):
+        original_gpt_cond_latent, original_speaker_embedding = self.get_original_conditioning_latents(
+            audio_input, training=training
+        )
+
+        return self.apply_valence_arousal(
+            original_gpt_cond_latent, original_speaker_embedding, valence, arousal
+        )
+
+    def get_original_conditioning_latents(self, audio_input, training=False, sample_rate=None):
+        """Frozen XTTS conditioning latents; compute once per reference and reuse"""
         device = next(self.parameters()).device
 
-        temp_path = None
-        try:
-            if training and isinstance(audio_input, torch.Tensor):
-                audio_input = prepare_audio_tensor(audio_input)
-                temp_path = create_temp_audio_file(audio_input)
-                audio_path_for_xtts = [temp_path]
+        # XTTS is frozen, so outside training the latents only depend on the reference audio
+        cache_key = None if training else self._conditioning_cache_key(audio_input, sample_rate)
+        if cache_key is not None and cache_key in self._cond_cache:
+            self._cond_cache.move_to_end(cache_key)
+            return self._cond_cache[cache_key]
+
+        with torch.set_grad_enabled(training):
+            if isinstance(audio_input, torch.Tensor):
+                original_gpt_cond_latent, original_speaker_embedding = self._get_conditioning_latents_from_tensor(
+                    audio_input, sample_rate=sample_rate
+                )
 
             elif isinstance(audio_input, (str, list)):
                 audio_path_for_xtts = audio_input if isinstance(audio_input, list) else [audio_input]
-            else:
-                raise ValueError(f"Unsupported audio_input type: {type(audio_input)}")
-
-            if training:
                 original_gpt_cond_latent, original_speaker_embedding = self.xtts.get_conditioning_latents(
                     audio_path=audio_path_for_xtts
                 )
             else:
-                with torch.no_grad():
-                    original_gpt_cond_latent, original_speaker_embedding = self.xtts.get_conditioning_latents(
-                        audio_path=audio_path_for_xtts
-                    )
+                raise ValueError(f"Unsupported audio_input type: {type(audio_input)}")
+
+        # XTTS normally returns these on device already; only copy when it did not
+        if original_gpt_cond_latent.device != device:
+            original_gpt_cond_latent = original_gpt_cond_latent.to(device, non_blocking=True)
+        if original_speaker_embedding.device != device:
+            original_speaker_embedding = original_speaker_embedding.to(device, non_blocking=True)
+        latents = original_gpt_cond_latent, original_speaker_embedding
 
-        finally:
-            if temp_path is not None:
-                cleanup_temp_file(temp_path)
+        if cache_key is not None:
+            self._cond_cache[cache_key] = latents
+            if len(self._cond_cache) > self.cond_cache_size:
+                self._cond_cache.popitem(last=False)
 
-        original_gpt_cond_latent = original_gpt_cond_latent.to(device)
-        original_speaker_embedding = original_speaker_embedding.to(device)
+        return latents
 
-        if not isinstance(valence, torch.Tensor):
-            valence = torch.tensor(valence, dtype=torch.float32, device=device)
-        else:
-            valence = valence.to(device)
+    def _conditioning_cache_key(self, audio_input, sample_rate=None):
+        """Paths are keyed by modification time, tensors by a digest of their samples"""
+        device = str(next(self.parameters()).device)
 
-        if not isinstance(arousal, torch.Tensor):
-            arousal = torch.tensor(arousal, dtype=torch.float32, device=device)
-        else:
-            arousal = arousal.to(device)
+        if isinstance(audio_input, torch.Tensor):
+            samples = audio_input.detach().cpu().numpy().tobytes()
+            return hashlib.blake2b(samples, digest_size=16).hexdigest(), sample_rate, device
+
+        if not isinstance(audio_input, (str, list)):
+            return None
 
+        paths = audio_input if isinstance(audio_input, list) else [audio_input]
+        return tuple((path, os.path.getmtime(path)) for path in paths), device
+
+    def _get_conditioning_latents_from_tensor(self, audio_tensor, sample_rate=None, max_ref_length=30,
+                                              gpt_cond_len=6, gpt_cond_chunk_len=6):
+        """xtts.get_conditioning_latents for an in-memory waveform, without the temp wav round-trip"""
+        xtts_sample_rate = DEFAULT_XTTS_CONFIG["sample_rate"]
+        audio = audio_tensor.reshape(-1).to(self.xtts.device, dtype=torch.float32)
+
+        if sample_rate is not None and sample_rate != xtts_sample_rate:
+            key = (sample_rate, audio.device)
+            if key not in self._resamplers:
+                self._resamplers[key] = torchaudio.transforms.Resample(
+                    sample_rate, xtts_sample_rate
+                ).to(audio.device)
+            audio = self._resamplers[key](audio)
+
+        # Same clipping and reference-length limit XTTS applies to audio it loads from disk
+        audio = audio.clamp(-1.0, 1.0)[:xtts_sample_rate * max_ref_length].unsqueeze(0)
+
+        speaker_embedding = self.xtts.get_speaker_embedding(audio, xtts_sample_rate)
+        gpt_cond_latent = self.xtts.get_gpt_cond_latents(
+            audio, xtts_sample_rate, length=gpt_cond_len, chunk_length=gpt_cond_chunk_len
+        )
+        return gpt_cond_latent, speaker_embedding
+
+    def apply_valence_arousal(self, original_gpt_cond_latent, original_speaker_embedding, valence, arousal):
+        # The adapter packs valence/arousal into one tensor and uploads it once
         emotion_gpt_latent, emotion_speaker_embedding = self.va_adapter(
             original_gpt_cond_latent, original_speaker_embedding, valence, arousal
         )
@@ -284,19 +388,41 @@ class ValenceArousalXTTS(nn.Module):
 
             assert gpt_cond_latent.dim() == 3, f"GPT latent should be 3D, got {gpt_cond_latent.dim()}D: {gpt_cond_latent.shape}"
 
-            return self.xtts.inference(
-                text,
-                language,
-                gpt_cond_latent,
-                speaker_embedding,
-                **kwargs
-            )
+            # The synthesised audio never feeds autograd; the latents above may (they are cached
+            # and reused by the conditioning loss), so only the decode runs in inference mode
+            with torch.inference_mode():
+                return self.xtts.inference(
+                    text,
+                    language,
+                    gpt_cond_latent,
+                    speaker_embedding,
+                    **kwargs
+                )
         except Exception as e:
             print(f"Error during inference: {e}")
             print(f"GPT latent shape: {gpt_cond_latent.shape if 'gpt_cond_latent' in locals() else 'undefined'}")
             print(f"Speaker embedding shape: {speaker_embedding.shape if 'speaker_embedding' in locals() else 'undefined'}")
             raise e
 
+    def compile_hot_paths(self):
+        """torch.compile the VA adapter and the DVAE encoder; anything that fails to compile runs eagerly"""
+        try:
+            # Compiling forward (not wrapping the module) keeps the adapter's state_dict keys
+            # mode="default": reduce-overhead's CUDA graphs re-record on every new batch size
+            eager_forward = self.va_adapter.forward
+            self.va_adapter.forward = _with_eager_fallback(
+                torch.compile(eager_forward, mode="default", dynamic=False), eager_forward, "VA adapter"
+            )
+            if self.dvae is not None:
+                # Mel length varies with the clip, so the encoder is compiled for dynamic shapes
+                eager_encode = self.dvae.get_codebook_indices
+                self.dvae.get_codebook_indices = _with_eager_fallback(
+                    torch.compile(eager_encode, dynamic=True), eager_encode, "DVAE encoder"
+                )
+            print("✅ VA adapter and DVAE encoder compiled")
+        except Exception as e:
+            print(f"⚠️  torch.compile unavailable, running eagerly: {e}")
+
     def unfreeze_valence_arousal_adapter(self):
         freeze_model_parameters(self.va_adapter, freeze=False)
         print("Valence-arousal adapter unfrozen for training")
@@ -304,8 +430,10 @@ class ValenceArousalXTTS(nn.Module):
     def unfreeze_last_n_gpt_layers(self, n=2):
         gpt_layers = self.xtts.gpt.gpt.layers
 
-        for layer in gpt_layers[-n:]:
-            freeze_model_parameters(layer, freeze=False)
+        # One flat walk over the selected layers' parameters; n=0 must not slice to the whole stack
+        layers = gpt_layers[len(gpt_layers) - n:] if n > 0 else []
+        for param in itertools.chain.from_iterable(layer.parameters() for layer in layers):
+            param.requires_grad_(True)
 
         print(f"Last {n} GPT layers unfrozen for fine-tuning")
 
@@ -329,6 +457,6 @@ class ValenceArousalXTTS(nn.Module):
         print(f"Valence-arousal adapter saved to {save_path}")
 
     def load_valence_arousal_adapter(self, load_path):
-        checkpoint = torch.load(load_path, map_location=next(self.parameters()).device)
+        checkpoint = torch.load(load_path, map_location=next(self.parameters()).device, weights_only=True)
         self.va_adapter.load_state_dict(checkpoint['va_adapter_state_dict'])
         print(f"Valence-arousal adapter loaded from {load_path}")
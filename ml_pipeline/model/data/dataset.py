@@ -1,23 +1,25 @@
 import json
 import torch
 import torchaudio
-import random
+import numpy as np
 from torch.utils.data import Dataset
-from typing import Dict
+from typing import Dict, List
 import os
 from pathlib import Path
 
 
+METADATA_COLUMNS = ['dataset', 'processed_audio_path', 'text', 'valence', 'arousal']
+
+
 class ValenceArousalDataset(Dataset):
     def __init__(self, config: Dict):
         self.config = config
         self.sample_rate = config['data']['sample_rate']
         self.data_dir = Path(config['data'].get('data_dir', '../data'))
+        self.rng = np.random.default_rng(config.get('seed'))
 
         metadata_path = config['data']['metadata_path']
-
-        with open(metadata_path, 'r') as f:
-            all_metadata = json.load(f)
+        all_metadata = self._read_metadata(metadata_path)
 
         self.metadata = []
         skipped = 0
@@ -67,6 +69,27 @@ class ValenceArousalDataset(Dataset):
         self._parse_emotions()
         self._create_cross_emotional_mappings()
 
+        # Targets as two contiguous columns: __getitem__ indexes them instead of building a tensor per item.
+        # Filled straight into float32 buffers that the tensors then share (no intermediate list or copy)
+        n = len(self.metadata)
+        self.valences = torch.from_numpy(np.fromiter((item['valence'] for item in self.metadata), np.float32, n))
+        self.arousals = torch.from_numpy(np.fromiter((item['arousal'] for item in self.metadata), np.float32, n))
+
+    @staticmethod
+    def _read_metadata(metadata_path: str) -> List[Dict]:
+        """Load metadata rows from the consolidated JSON or the partitioned Parquet dataset."""
+        path = Path(metadata_path)
+        if path.is_dir() or path.suffix == '.parquet':
+            import pyarrow.parquet as pq
+
+            # Memory-map the files and read only the columns training uses, instead of
+            # materialising every annotation field of every row
+            table = pq.read_table(path, columns=METADATA_COLUMNS, memory_map=True)
+            return table.to_pylist()
+
+        with open(path, 'r') as f:
+            return json.load(f)
+
     def _parse_speaker_id(self, filename: str, dataset: str) -> str:
         """Parse speaker ID from filename based on dataset."""
         basename = os.path.basename(filename)
@@ -196,8 +219,12 @@ class ValenceArousalDataset(Dataset):
                         target_indices = self.speaker_emotion_map[speaker][target_emotion]
 
                         # Smart sampling: only take a few pairs per emotion combination
-                        ref_sample = random.sample(ref_indices, min(max_pairs_per_speaker_emotion, len(ref_indices)))
-                        target_sample = random.sample(target_indices, min(max_pairs_per_speaker_emotion, len(target_indices)))
+                        ref_sample = self.rng.choice(
+                            ref_indices, min(max_pairs_per_speaker_emotion, len(ref_indices)), replace=False
+                        ).tolist()
+                        target_sample = self.rng.choice(
+                            target_indices, min(max_pairs_per_speaker_emotion, len(target_indices)), replace=False
+                        ).tolist()
 
                         # Create limited pairs
                         for ref_idx in ref_sample:
@@ -212,7 +239,8 @@ class ValenceArousalDataset(Dataset):
         if self.config.get('quick_test', {}).get('enabled', False):
             max_pairs = self.config['quick_test'].get('max_samples', 1000)
             if len(self.cross_emotional_pairs) > max_pairs:
-                self.cross_emotional_pairs = random.sample(self.cross_emotional_pairs, max_pairs)
+                keep = self.rng.choice(len(self.cross_emotional_pairs), max_pairs, replace=False)
+                self.cross_emotional_pairs = [self.cross_emotional_pairs[i] for i in keep]
                 print(f"Quick test mode: Limited to {len(self.cross_emotional_pairs)} pairs")
 
     def _load_audio_safe(self, audio_path: str, description: str = "audio") -> torch.Tensor:
@@ -220,19 +248,20 @@ class ValenceArousalDataset(Dataset):
         try:
             waveform, sr = torchaudio.load(audio_path)
 
+            # Convert to mono if stereo (before resampling, so only one channel is resampled)
+            if waveform.shape[0] > 1:
+                waveform = torch.mean(waveform, dim=0, keepdim=True)
+
             # Resample if necessary
             if sr != self.sample_rate:
                 resampler = torchaudio.transforms.Resample(sr, self.sample_rate)
                 waveform = resampler(waveform)
 
-            # Convert to mono if stereo
-            if waveform.shape[0] > 1:
-                waveform = torch.mean(waveform, dim=0, keepdim=True)
-
             # Normalize audio
-            max_val = torch.max(torch.abs(waveform))
+            min_val, max_val = torch.aminmax(waveform)
+            max_val = torch.maximum(max_val, -min_val)
             if max_val > 0:
-                waveform = waveform / max_val
+                waveform.div_(max_val)
 
             return waveform.squeeze(0)
 
@@ -250,17 +279,13 @@ class ValenceArousalDataset(Dataset):
         ref_sample = self.metadata[ref_idx]
         target_sample = self.metadata[target_idx]
 
-        # Load reference audio (for speaker conditioning)
+        # Reference audio is only consumed by path (XTTS conditioning reads the file itself),
+        # so it is not decoded here
         ref_audio_path = self.data_dir / ref_sample['processed_audio_path']
-        ref_audio = self._load_audio_safe(str(ref_audio_path), "reference audio")
 
         # Reference speaker file path (for XTTS conditioning)
         ref_speaker_path = str(ref_audio_path.resolve())
 
-        # Target emotion values (what we want to generate) - already clamped to [0,1]
-        target_valence = float(target_sample['valence'])
-        target_arousal = float(target_sample['arousal'])
-
         # Target audio (ground truth for VAD comparison)
         target_audio_path = self.data_dir / target_sample['processed_audio_path']
         target_audio = self._load_audio_safe(str(target_audio_path), "target audio")
@@ -269,16 +294,25 @@ class ValenceArousalDataset(Dataset):
             # Generation inputs
             'text': target_sample['text'],  # Text to generate
             'speaker_ref': ref_speaker_path,  # Speaker reference for conditioning
-            'target_valence': torch.tensor(target_valence, dtype=torch.float32),
-            'target_arousal': torch.tensor(target_arousal, dtype=torch.float32),
+            # Target emotion values (what we want to generate) - already clamped to [0,1]
+            'target_valence': self.valences[target_idx],
+            'target_arousal': self.arousals[target_idx],
 
             # Ground truth for comparison
-            'target_audio': target_audio,
-            'target_audio_path': str(target_audio_path.resolve()),
+            'target_audio': target_audio
+        }
+
+    def get_metadata(self, idx):
+        """Descriptive fields for a pair; kept out of __getitem__ so training batches don't carry them."""
+        ref_idx, target_idx = self.cross_emotional_pairs[idx]
 
-            # Metadata
+        ref_sample = self.metadata[ref_idx]
+        target_sample = self.metadata[target_idx]
+
+        return {
+            'target_audio_path': str((self.data_dir / target_sample['processed_audio_path']).resolve()),
             'ref_emotion': ref_sample['emotion_label'],
             'target_emotion': target_sample['emotion_label'],
             'speaker_id': ref_sample['speaker_id'],
-            'ref_audio_path': str(ref_audio_path.resolve())
+            'ref_audio_path': str((self.data_dir / ref_sample['processed_audio_path']).resolve())
         }
\ No newline at end of file
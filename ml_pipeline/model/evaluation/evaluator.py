@@ -30,13 +30,14 @@ class EmotionEvaluator:
 
                 for i in range(batch_size):
                     try:
-                        target_valence = batch['target_valences'][i].to(self.device)
-                        target_arousal = batch['target_arousals'][i].to(self.device)
+                        target_valence = batch['target_valences'][i].to(self.device, non_blocking=True)
+                        target_arousal = batch['target_arousals'][i].to(self.device, non_blocking=True)
 
                         # Compute conditioning loss
-                        conditioning_loss, cond_info = compute_conditioning_loss(
-                            self.model, batch['speaker_refs'][i], target_valence, target_arousal
-                        )
+                        with self.model.autocast():
+                            conditioning_loss, cond_info = compute_conditioning_loss(
+                                self.model, batch['speaker_refs'][i], target_valence, target_arousal
+                            )
 
                         # Generate and evaluate audio
                         generated_audio = generate_audio_sample(
@@ -50,7 +51,7 @@ class EmotionEvaluator:
                         )
 
                         if torch.isfinite(conditioning_loss) and vad_result:
-                            total_conditioning_loss += conditioning_loss.item()
+                            total_conditioning_loss += conditioning_loss.detach()
                             valid_samples += 1
                             vad_metrics['valence_mae'] += abs(vad_result['pred_valence'] - target_valence.item())
                             vad_metrics['arousal_mae'] += abs(vad_result['pred_arousal'] - target_arousal.item())
@@ -61,7 +62,7 @@ class EmotionEvaluator:
 
                 if valid_samples > 0:
                     return {
-                        'conditioning_loss': total_conditioning_loss / valid_samples,
+                        'conditioning_loss': float(total_conditioning_loss) / valid_samples,
                         'valence_mae': vad_metrics['valence_mae'] / valid_samples,
                         'arousal_mae': vad_metrics['arousal_mae'] / valid_samples,
                         'valid_samples': valid_samples
@@ -11,12 +11,15 @@ class VADAnalyzer:
         self, 
         model_dir: str = "./models/vad_model",
         cache_dir: str = "./models/vad_cache",
-        verbose: bool = True
+        verbose: bool = True,
+        include_embedding: bool = False
     ):
         self.target_sample_rate = 16000
         self.model_dir = model_dir
         self.cache_dir = cache_dir
         self.verbose = verbose
+        # Training/validation only read valence and arousal; the 1024-dim embedding is opt-in
+        self.include_embedding = include_embedding
         
         self.model = None
         self.model_available = False
@@ -77,16 +80,20 @@ class VADAnalyzer:
         
         confidence = float(1.0 / (1.0 + np.std(logits[0])))
         
-        return {
+        result = {
             "valence": valence,
             "arousal": arousal, 
             "dominance": dominance,
             "vad_scores": [valence, arousal, dominance],
-            "vad_embedding": hidden_states[0].tolist(),
             "confidence": confidence,
-            "raw_logits": logits[0].tolist(),  # Include raw scores for debugging
-            "raw_embeddings_shape": list(hidden_states.shape)
+            "raw_logits": logits[0].tolist()  # Include raw scores for debugging
         }
+        
+        if self.include_embedding:
+            result["vad_embedding"] = hidden_states[0].tolist()
+            result["raw_embeddings_shape"] = list(hidden_states.shape)
+        
+        return result
 
     def get_analyzer_info(self) -> Dict:
         base_info = {
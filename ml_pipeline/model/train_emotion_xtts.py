@@ -3,6 +3,7 @@ from model.training.trainer import EmotionalXTTSTrainer
 
 def main():
     import argparse
+    # Multi-GPU: torchrun --nproc_per_node=N train_emotion_xtts.py --config ...
     parser = argparse.ArgumentParser(description="Train VAD-Guided Emotional XTTS model")
     parser.add_argument("--config", type=str, default="config/config.yaml", help="Path to config file")
     parser.add_argument("--resume", type=str, default=None, help="Path to checkpoint to resume from")
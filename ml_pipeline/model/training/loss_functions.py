@@ -10,17 +10,15 @@ def compute_conditioning_loss(model, speaker_ref_path, target_valence, target_ar
         target_valence = target_valence.to(device)
         target_arousal = target_arousal.to(device)
 
-        with torch.no_grad():
-            original_gpt_latent, original_speaker_emb = model.model.xtts.get_conditioning_latents([speaker_ref_path])
-            original_gpt_latent = original_gpt_latent.to(device)
-            original_speaker_emb = original_speaker_emb.to(device)
-
-        emotion_gpt_latent, emotion_speaker_emb = model.model.get_conditioning_latents_with_valence_arousal(
-            speaker_ref_path, target_valence, target_arousal, training=True
+        # XTTS is frozen, so the reference is encoded once and the adapter runs on those latents.
+        # Both calls already return tensors on the model's device
+        original_gpt_latent, original_speaker_emb = model.model.get_original_conditioning_latents(
+            speaker_ref_path
         )
 
-        emotion_gpt_latent = emotion_gpt_latent.to(device)
-        emotion_speaker_emb = emotion_speaker_emb.to(device)
+        emotion_gpt_latent, emotion_speaker_emb = model.model.apply_valence_arousal(
+            original_gpt_latent, original_speaker_emb, target_valence, target_arousal
+        )
 
         gpt_diff = torch.norm(emotion_gpt_latent - original_gpt_latent)
         speaker_diff = torch.norm(emotion_speaker_emb - original_speaker_emb)
@@ -37,14 +35,15 @@ def compute_conditioning_loss(model, speaker_ref_path, target_valence, target_ar
 
         total_loss = gpt_loss + speaker_loss + reg_loss
 
+        # Detached 0-d tensors rather than floats: callers reduce them on device and sync once per step
         return total_loss, {
-            'gpt_diff': gpt_diff.item(),
-            'speaker_diff': speaker_diff.item(),
-            'target_gpt_mod': target_gpt_modification.item(),
-            'target_speaker_mod': target_speaker_modification.item(),
-            'gpt_loss': gpt_loss.item(),
-            'speaker_loss': speaker_loss.item(),
-            'reg_loss': reg_loss.item()
+            'gpt_diff': gpt_diff.detach(),
+            'speaker_diff': speaker_diff.detach(),
+            'target_gpt_mod': target_gpt_modification.detach(),
+            'target_speaker_mod': target_speaker_modification.detach(),
+            'gpt_loss': gpt_loss.detach(),
+            'speaker_loss': speaker_loss.detach(),
+            'reg_loss': reg_loss.detach()
         }
 
     except Exception as e:
@@ -4,19 +4,11 @@ from typing import Dict
 
 
 def get_vad_guided_targets(model, target_valence, target_arousal):
-    emotion_magnitude = torch.sqrt(target_valence**2 + target_arousal**2)
+    # Stays on the targets' device: no .item() sync and no fresh host tensors copied over per sample
+    emotion_scale = (0.5 + torch.sqrt(target_valence**2 + target_arousal**2)).detach()
 
-    target_gpt_modification = torch.tensor(
-        model.adaptive_gpt_strength * (0.5 + emotion_magnitude.item()),
-        requires_grad=False,
-        device=target_valence.device
-    )
-
-    target_speaker_modification = torch.tensor(
-        model.adaptive_speaker_strength * (0.5 + emotion_magnitude.item()),
-        requires_grad=False,
-        device=target_valence.device
-    )
+    target_gpt_modification = model.adaptive_gpt_strength * emotion_scale
+    target_speaker_modification = model.adaptive_speaker_strength * emotion_scale
 
     return target_gpt_modification, target_speaker_modification
 
@@ -70,8 +62,12 @@ class EmotionMetrics:
         if not self.valence_predictions:
             return {'valence_mae': 0.0, 'arousal_mae': 0.0, 'emotion_accuracy': 0.0}
 
-        valence_mae = np.mean(np.abs(np.array(self.valence_predictions) - np.array(self.valence_targets)))
-        arousal_mae = np.mean(np.abs(np.array(self.arousal_predictions) - np.array(self.arousal_targets)))
+        # Une seule conversion en tableau: les erreurs servent à la fois pour MAE et RMSE
+        valence_errors = np.asarray(self.valence_predictions) - np.asarray(self.valence_targets)
+        arousal_errors = np.asarray(self.arousal_predictions) - np.asarray(self.arousal_targets)
+
+        valence_mae = np.mean(np.abs(valence_errors))
+        arousal_mae = np.mean(np.abs(arousal_errors))
 
         # Calcul de la précision émotionnelle globale
         emotion_accuracy = max(0.0, 1.0 - (valence_mae + arousal_mae) / 2.0)
@@ -80,6 +76,6 @@ class EmotionMetrics:
             'valence_mae': valence_mae,
             'arousal_mae': arousal_mae,
             'emotion_accuracy': emotion_accuracy,
-            'valence_rmse': np.sqrt(np.mean((np.array(self.valence_predictions) - np.array(self.valence_targets))**2)),
-            'arousal_rmse': np.sqrt(np.mean((np.array(self.arousal_predictions) - np.array(self.arousal_targets))**2))
+            'valence_rmse': np.sqrt(np.mean(np.square(valence_errors))),
+            'arousal_rmse': np.sqrt(np.mean(np.square(arousal_errors)))
         }
@@ -1,4 +1,10 @@
+import os
+import shutil
+import torch
+import torch.distributed as dist
 from torch.utils.data import DataLoader
+from torch.utils.data.distributed import DistributedSampler
+from concurrent.futures import ThreadPoolExecutor
 from torch.optim import AdamW
 from torch.optim.lr_scheduler import CosineAnnealingLR
 import yaml
@@ -18,6 +24,35 @@ from model.evaluation.vad_analyzer import VADAnalyzer
 from model.evaluation.evaluator import EmotionEvaluator
 from model.utils.device_utils import get_optimal_device, get_device_info
 
+# libyaml's C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+def _to_cpu(obj):
+    """Detached CPU copy of every tensor in a (nested) state dict"""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().cpu().clone()
+    if isinstance(obj, dict):
+        return {key: _to_cpu(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(value) for value in obj)
+    return obj
+
+
+def _atomic_save(obj, path, copies=()):
+    """torch.save to a temp file and rename, so a crash never leaves a truncated checkpoint"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    torch.save(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+    for copy_path in copies:
+        tmp_copy = copy_path.with_name(copy_path.name + '.tmp')
+        shutil.copyfile(path, tmp_copy)
+        os.replace(tmp_copy, copy_path)
+
+
 class EmotionalXTTSTrainer:
     def __init__(self, config_path):
         self.optimizer = None
@@ -30,9 +65,12 @@ class EmotionalXTTSTrainer:
         self.log_file = None
         self.log_dir = None
         self.checkpoint_dir = None
+        # Checkpoints are written in the background; one in flight at a time
+        self._save_executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_save = None
 
         with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
+            self.config = yaml.load(f, Loader=SafeLoader)
 
         # Auto-select optimal device with fallback
         optimal_device = get_optimal_device()
@@ -55,8 +93,37 @@ class EmotionalXTTSTrainer:
             else:
                 self.device = torch.device(specified_device)
 
+        # Multi-GPU: launched with torchrun, one process per GPU
+        self.world_size = int(os.environ.get('WORLD_SIZE', 1))
+        self.distributed = self.world_size > 1
+        self.rank = 0
+        if self.distributed:
+            dist.init_process_group(backend='nccl' if self.device.type == 'cuda' else 'gloo')
+            self.rank = dist.get_rank()
+            if self.device.type == 'cuda':
+                local_rank = int(os.environ.get('LOCAL_RANK', 0))
+                torch.cuda.set_device(local_rank)
+                self.device = torch.device('cuda', local_rank)
+            print(f"Distributed training: rank {self.rank}/{self.world_size}")
+        self.is_main_process = self.rank == 0
+
         print(f"Using device: {self.device}")
 
+        if self.device.type == 'cuda':
+            # TF32 tensor cores for fp32 matmuls/convs on Ampere+ (ignored on older GPUs)
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+            torch.set_float32_matmul_precision('high')
+            # Off by default: reference clips vary in length, and the autotuner re-benchmarks every new shape
+            torch.backends.cudnn.benchmark = self.config['training'].get('cudnn_benchmark', False)
+
+        self.autocast_dtype = self.resolve_autocast_dtype(self.config['training'].get('precision', 'fp32'))
+        # Batches per optimizer step; gradients are only synchronized across ranks on the last one
+        self.grad_accum_steps = self.config['training'].get('grad_accum_steps', 1)
+        self.micro_step = 0
+        # fp16 needs loss scaling to keep small gradients from underflowing; bf16 and fp32 do not
+        self.scaler = torch.cuda.amp.GradScaler(enabled=self.autocast_dtype == torch.float16)
+
         self.setup_logging()
 
         print("Loading VAD analyzer...")
@@ -75,7 +142,7 @@ class EmotionalXTTSTrainer:
             raise RuntimeError("VAD analyzer failed to initialize. Cannot train without emotional evaluation.")
 
         print("Loading Emotional XTTS model...")
-        self.model = ValenceArousalXTTS(local_model_dir="./models/xtts_v2")
+        self.model = ValenceArousalXTTS(local_model_dir="./models/xtts_v2", device=self.device)
         self.model = self.model.to(self.device)  # This should handle all submodules
 
         print(f"Model device: {next(self.model.parameters()).device}")
@@ -83,6 +150,10 @@ class EmotionalXTTSTrainer:
 
         self.model.unfreeze_valence_arousal_adapter()
 
+        # Static-shape adapter forward: worth compiling on CUDA, not worth the compile time elsewhere
+        if self.config['model'].get('compile', True) and self.device.type == 'cuda':
+            self.model.compile_hot_paths()
+
         print("Loading dataset...")
         self.setup_dataset()
 
@@ -136,6 +207,35 @@ class EmotionalXTTSTrainer:
 
         print("Trainer initialization complete!")
 
+    def resolve_autocast_dtype(self, precision):
+        """Autocast dtype for the adapter forward/loss, or None to stay in fp32"""
+        if precision == 'fp32':
+            return None
+
+        if precision == 'bf16':
+            if self.device.type == 'cuda' and torch.cuda.is_bf16_supported():
+                print("✅ Training with bf16 autocast")
+                return torch.bfloat16
+            print(f"⚠️  bf16 not supported on {self.device}, training in fp32")
+            return None
+
+        if precision == 'fp16':
+            if self.device.type == 'cuda':
+                print("✅ Training with fp16 autocast and gradient scaling")
+                return torch.float16
+            print(f"⚠️  fp16 autocast needs CUDA (found {self.device}), training in fp32")
+            return None
+
+        raise ValueError(f"Unsupported training precision: {precision}")
+
+    def autocast(self):
+        """Mixed-precision context for forward + loss; backward and optimizer steps stay outside"""
+        return torch.autocast(
+            device_type='cuda',
+            dtype=self.autocast_dtype or torch.float32,
+            enabled=self.autocast_dtype is not None
+        )
+
     def setup_logging(self):
         self.checkpoint_dir = Path(self.config['paths']['checkpoint_dir'])
         self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
@@ -158,24 +258,41 @@ class EmotionalXTTSTrainer:
         val_size = int(0.1 * dataset_size)
         train_size = dataset_size - val_size
 
+        # Seeded so every rank of a distributed run gets the same split
         self.train_dataset, self.val_dataset = torch.utils.data.random_split(
-            self.dataset, [train_size, val_size]
+            self.dataset, [train_size, val_size],
+            generator=torch.Generator().manual_seed(self.config.get('seed', 42))
         )
 
+        num_workers = self.config.get('num_workers', min(8, os.cpu_count() or 1))
+        loader_kwargs = {
+            'collate_fn': cross_emotional_collate_fn,
+            'num_workers': num_workers,
+            # Pinned batches let the per-sample targets go to the GPU with non_blocking copies
+            'pin_memory': self.device.type == 'cuda',
+            # Keep workers (and their open audio/metadata state) alive across epochs
+            'persistent_workers': num_workers > 0
+        }
+        if num_workers > 0:
+            # Each item is a dict of audio + strings pickled through worker IPC; queue a few batches ahead
+            loader_kwargs['prefetch_factor'] = self.config.get('prefetch_factor', 4)
+
+        # Each rank trains on its own shard; the sampler does the shuffling
+        self.train_sampler = DistributedSampler(self.train_dataset, shuffle=True) if self.distributed else None
+
         self.train_dataloader = DataLoader(
             self.train_dataset,
             batch_size=self.config['training']['batch_size'],
-            shuffle=True,
-            collate_fn=cross_emotional_collate_fn,
-            num_workers=self.config.get('num_workers', 2)  # Reduced for stability
+            shuffle=self.train_sampler is None,
+            sampler=self.train_sampler,
+            **loader_kwargs
         )
 
         self.val_dataloader = DataLoader(
             self.val_dataset,
             batch_size=self.config['training']['batch_size'],
             shuffle=False,
-            collate_fn=cross_emotional_collate_fn,
-            num_workers=self.config.get('num_workers', 2)
+            **loader_kwargs
         )
 
         print(f"Dataset split: {len(self.train_dataset)} train, {len(self.val_dataset)} validation")
@@ -186,11 +303,17 @@ class EmotionalXTTSTrainer:
 
         print(f"Training {sum(p.numel() for p in adapter_params)} adapter parameters")
 
-        self.optimizer = AdamW(
-            adapter_params,
-            lr=float(self.config['training']['learning_rate']),
-            weight_decay=float(self.config['optimization']['weight_decay'])
-        )
+        optimizer_kwargs = {
+            'lr': float(self.config['training']['learning_rate']),
+            'weight_decay': float(self.config['optimization']['weight_decay'])
+        }
+
+        # One fused kernel for all adapter tensors on CUDA; multi-tensor (foreach) updates elsewhere
+        try:
+            self.optimizer = AdamW(adapter_params, fused=self.device.type == 'cuda', **optimizer_kwargs)
+        except (RuntimeError, TypeError) as e:
+            print(f"⚠️  Fused AdamW unavailable, using foreach: {e}")
+            self.optimizer = AdamW(adapter_params, foreach=True, **optimizer_kwargs)
 
         self.scheduler = CosineAnnealingLR(
             self.optimizer,
@@ -198,10 +321,82 @@ class EmotionalXTTSTrainer:
             eta_min=float(self.config['training']['learning_rate']) * 0.1
         )
 
+    def all_reduce_gradients(self):
+        """Average adapter gradients across ranks with a single flattened all-reduce.
+
+        Returns the number of ranks that accumulated any gradient in this window.
+        """
+        params = [p for p in self.model.va_adapter.parameters() if p.requires_grad]
+        has_grads = any(param.grad is not None for param in params)
+        for param in params:
+            if param.grad is None:
+                param.grad = torch.zeros_like(param)
+
+        # A trailing flag rides along with the gradients to count the ranks that had any
+        flag = torch.tensor([float(has_grads)], dtype=params[0].grad.dtype, device=params[0].grad.device)
+        flat = torch.cat([param.grad.reshape(-1) for param in params] + [flag])
+        dist.all_reduce(flat)
+        ranks_with_grads = int(flat[-1].item())
+        flat /= self.world_size
+
+        offset = 0
+        for param in params:
+            numel = param.grad.numel()
+            param.grad.copy_(flat[offset:offset + numel].view_as(param.grad))
+            offset += numel
+
+        return ranks_with_grads
+
+    def optimizer_step(self):
+        params = list(self.model.va_adapter.parameters())
+        if not self.distributed and all(p.grad is None for p in params):
+            # Nothing accumulated this window (every sample failed or was skipped)
+            return
+
+        if self.distributed:
+            # Before unscaling, so an inf on any rank makes every rank skip the step together
+            if self.all_reduce_gradients() == 0:
+                # No rank accumulated anything this window; all of them skip the step
+                return
+
+        # Clip the true gradients, not the scaled ones
+        self.scaler.unscale_(self.optimizer)
+        torch.nn.utils.clip_grad_norm_(params, 1.0)
+
+        self.scaler.step(self.optimizer)
+        self.scaler.update()
+
+    def reduce_vad_metrics(self, vad_metrics, vad_samples):
+        """Sum VAD errors and sample counts over ranks, so every rank adapts the same targets"""
+        if not self.distributed:
+            return vad_metrics, vad_samples
+
+        totals = torch.tensor(
+            [vad_metrics['valence_mae'], vad_metrics['arousal_mae'], vad_samples],
+            dtype=torch.float64, device=self.device
+        )
+        dist.all_reduce(totals)
+        valence_mae, arousal_mae, vad_samples = totals.tolist()
+        return {'valence_mae': valence_mae, 'arousal_mae': arousal_mae}, int(vad_samples)
+
     def training_step(self, batch):
-        try:
-            self.optimizer.zero_grad()
+        if self.micro_step % self.grad_accum_steps == 0:
+            self.optimizer.zero_grad(set_to_none=True)
+        self.micro_step += 1
+        # Micro-steps only accumulate locally: no all-reduce, no optimizer step
+        accumulation_boundary = self.micro_step % self.grad_accum_steps == 0
+
+        do_vad_eval = (
+                not self.vad_disabled and
+                self.vad_training_enabled and
+                not self.vad_validation_only and
+                (self.training_step_count % self.vad_eval_frequency == 0)
+        )
+        vad_metrics = {'valence_mae': 0.0, 'arousal_mae': 0.0}
+        vad_samples = 0
+        step_metrics = None
 
+        try:
             batch_size = len(batch['texts'])
             total_loss = 0.0
             valid_samples = 0
@@ -213,27 +408,20 @@ class EmotionalXTTSTrainer:
                 'target_speaker_mod': 0.0
             }
 
-            do_vad_eval = (
-                    not self.vad_disabled and
-                    self.vad_training_enabled and
-                    not self.vad_validation_only and
-                    (self.training_step_count % self.vad_eval_frequency == 0)
-            )
-            vad_metrics = {'valence_mae': 0.0, 'arousal_mae': 0.0} if do_vad_eval else {}
-            vad_samples = 0
-
             for i in range(batch_size):
                 try:
-                    target_valence = batch['target_valences'][i].to(self.device)
-                    target_arousal = batch['target_arousals'][i].to(self.device)
-
-                    conditioning_loss, cond_info = compute_conditioning_loss(
-                        self,
-                        batch['speaker_refs'][i],
-                        target_valence,
-                        target_arousal
-                    )
-
+                    target_valence = batch['target_valences'][i].to(self.device, non_blocking=True)
+                    target_arousal = batch['target_arousals'][i].to(self.device, non_blocking=True)
+
+                    with self.autocast():
+                        conditioning_loss, cond_info = compute_conditioning_loss(
+                            self,
+                            batch['speaker_refs'][i],
+                            target_valence,
+                            target_arousal
+                        )
+
+                    # Only finite losses enter the graph: masking a NaN loss with torch.where still sends NaN gradients through backward
                     if torch.isfinite(conditioning_loss):
                         total_loss += conditioning_loss
                         valid_samples += 1
@@ -272,57 +460,47 @@ class EmotionalXTTSTrainer:
             if valid_samples > 0:
                 avg_loss = total_loss / valid_samples
 
-                avg_loss.backward()
-
-                torch.nn.utils.clip_grad_norm_(self.model.va_adapter.parameters(), 1.0)
-
-                self.optimizer.step()
-
-                for key in conditioning_metrics:
-                    conditioning_metrics[key] /= valid_samples
+                # The scaler is a pass-through unless training in fp16
+                self.scaler.scale(avg_loss / self.grad_accum_steps).backward()
+
+                # Loss and conditioning metrics accumulated on device; a single sync reads them all back
+                metric_keys = list(conditioning_metrics)
+                step_values = torch.stack(
+                    [avg_loss.detach().float()] +
+                    [torch.as_tensor(conditioning_metrics[key], device=self.device).float() / valid_samples
+                     for key in metric_keys]
+                ).tolist()
+                step_metrics = dict(zip(metric_keys, step_values[1:]))
+                step_metrics['total_loss'] = step_values[0]
+                step_metrics['valid_samples'] = valid_samples
+            else:
+                print("Warning: No valid samples in batch - skipping")
 
-                if do_vad_eval and vad_samples > 0:
+        except Exception as e:
+            print(f"Error in training step: {e}")
+            # A failure part-way through backward leaves partial gradients; drop this window's
+            self.optimizer.zero_grad(set_to_none=True)
+            step_metrics = None
+
+        finally:
+            # Collectives run here, in the same order on every rank, even when this rank failed:
+            # otherwise the other ranks would wait forever in their all-reduce
+            if do_vad_eval:
+                vad_metrics, vad_samples = self.reduce_vad_metrics(vad_metrics, vad_samples)
+                if vad_samples > 0:
                     for key in vad_metrics:
                         vad_metrics[key] /= vad_samples
 
                     vad_accuracy = max(0.0, 1.0 - (vad_metrics['valence_mae'] + vad_metrics['arousal_mae']) / 2.0)
                     update_vad_guided_targets(self, vad_accuracy)
 
-                self.training_step_count = getattr(self, 'training_step_count', 0) + 1
-
-                return {
-                    'total_loss': avg_loss.item(),
-                    'conditioning_loss': avg_loss.item(),
-                    'gpt_diff': conditioning_metrics['gpt_diff'],
-                    'speaker_diff': conditioning_metrics['speaker_diff'],
-                    'target_gpt_mod': conditioning_metrics['target_gpt_mod'],
-                    'target_speaker_mod': conditioning_metrics['target_speaker_mod'],
-                    'valence_mae': vad_metrics.get('valence_mae', 0.0),
-                    'arousal_mae': vad_metrics.get('arousal_mae', 0.0),
-                    'valid_samples': valid_samples,
-                    'vad_evaluated': do_vad_eval and vad_samples > 0,
-                    'adaptive_gpt_strength': self.adaptive_gpt_strength,
-                    'adaptive_speaker_strength': self.adaptive_speaker_strength
-                }
-            else:
-                print("Warning: No valid samples in batch - skipping")
-                return {
-                    'total_loss': 0.0,
-                    'conditioning_loss': 0.0,
-                    'gpt_diff': 0.0,
-                    'speaker_diff': 0.0,
-                    'target_gpt_mod': 0.0,
-                    'target_speaker_mod': 0.0,
-                    'valence_mae': 0.0,
-                    'arousal_mae': 0.0,
-                    'valid_samples': 0,
-                    'vad_evaluated': False,
-                    'adaptive_gpt_strength': self.adaptive_gpt_strength,
-                    'adaptive_speaker_strength': self.adaptive_speaker_strength
-                }
+            if accumulation_boundary:
+                self.optimizer_step()
 
-        except Exception as e:
-            print(f"Error in training step: {e}")
+            # Counted on every step, valid or not, so the VAD schedule stays aligned across ranks
+            self.training_step_count += 1
+
+        if step_metrics is None:
             return {
                 'total_loss': 0.0,
                 'conditioning_loss': 0.0,
@@ -338,6 +516,21 @@ class EmotionalXTTSTrainer:
                 'adaptive_speaker_strength': self.adaptive_speaker_strength
             }
 
+        return {
+            'total_loss': step_metrics['total_loss'],
+            'conditioning_loss': step_metrics['total_loss'],
+            'gpt_diff': step_metrics['gpt_diff'],
+            'speaker_diff': step_metrics['speaker_diff'],
+            'target_gpt_mod': step_metrics['target_gpt_mod'],
+            'target_speaker_mod': step_metrics['target_speaker_mod'],
+            'valence_mae': vad_metrics['valence_mae'] if vad_samples > 0 else 0.0,
+            'arousal_mae': vad_metrics['arousal_mae'] if vad_samples > 0 else 0.0,
+            'valid_samples': step_metrics['valid_samples'],
+            'vad_evaluated': vad_samples > 0,
+            'adaptive_gpt_strength': self.adaptive_gpt_strength,
+            'adaptive_speaker_strength': self.adaptive_speaker_strength
+        }
+
     def train_epoch(self, epoch):
         self.model.train()
         epoch_metrics = {
@@ -401,6 +594,11 @@ class EmotionalXTTSTrainer:
                     print(f"  Valence MAE: {metrics['valence_mae']:.3f}")
                     print(f"  Arousal MAE: {metrics['arousal_mae']:.3f}")
 
+        # Apply a trailing partial accumulation rather than carrying it into the next epoch
+        if self.micro_step % self.grad_accum_steps != 0:
+            self.optimizer_step()
+        self.micro_step = 0
+
         if num_batches > 0:
             for key in epoch_metrics:
                 epoch_metrics[key] /= num_batches
@@ -408,28 +606,41 @@ class EmotionalXTTSTrainer:
         return epoch_metrics
 
     def save_checkpoint(self, epoch, train_metrics, val_metrics, is_best=False):
-        checkpoint = {
+        # Adapter weights are identical on every rank
+        if not self.is_main_process:
+            return
+
+        # Snapshot to CPU now so training can keep updating the live tensors while the write runs
+        checkpoint = _to_cpu({
             'epoch': epoch,
             'va_adapter_state_dict': self.model.va_adapter.state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict(),
             'scheduler_state_dict': self.scheduler.state_dict(),
+            'scaler_state_dict': self.scaler.state_dict(),
             'train_metrics': train_metrics,
             'val_metrics': val_metrics,
             'config': self.config,
             'adaptive_gpt_strength': self.adaptive_gpt_strength,
             'adaptive_speaker_strength': self.adaptive_speaker_strength,
-            'vad_feedback_history': self.vad_feedback_history
-        }
+            'vad_feedback_history': list(self.vad_feedback_history)
+        })
 
         checkpoint_path = self.checkpoint_dir / f"checkpoint_epoch_{epoch}.pth"
-        torch.save(checkpoint, checkpoint_path)
+        # The best checkpoint is a file copy of this one rather than a second serialization
+        copies = (self.checkpoint_dir / "best_checkpoint.pth",) if is_best else ()
+
+        self.wait_for_checkpoint()
+        self._pending_save = self._save_executor.submit(_atomic_save, checkpoint, checkpoint_path, copies)
 
         if is_best:
-            best_path = self.checkpoint_dir / "best_checkpoint.pth"
-            torch.save(checkpoint, best_path)
-            print(f"New best checkpoint saved: {best_path}")
+            print(f"New best checkpoint queued: {copies[0]}")
+        print(f"Checkpoint queued: {checkpoint_path}")
 
-        print(f"Checkpoint saved: {checkpoint_path}")
+    def wait_for_checkpoint(self):
+        """Block until the in-flight checkpoint write is done, re-raising any error from it"""
+        if self._pending_save is not None:
+            self._pending_save.result()
+            self._pending_save = None
 
     def load_checkpoint(self, checkpoint_path):
         checkpoint = torch.load(checkpoint_path, map_location=self.device)
@@ -437,6 +648,8 @@ class EmotionalXTTSTrainer:
         self.model.va_adapter.load_state_dict(checkpoint['va_adapter_state_dict'])
         self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
         self.scheduler.load_state_dict(checkpoint['scheduler_state_dict'])
+        if 'scaler_state_dict' in checkpoint:
+            self.scaler.load_state_dict(checkpoint['scaler_state_dict'])
 
         if 'adaptive_gpt_strength' in checkpoint:
             self.adaptive_gpt_strength = checkpoint['adaptive_gpt_strength']
@@ -464,6 +677,9 @@ class EmotionalXTTSTrainer:
         for epoch in range(num_epochs):
             print(f"\nEpoch {epoch + 1}/{num_epochs}")
 
+            if self.train_sampler is not None:
+                self.train_sampler.set_epoch(epoch)
+
             train_metrics = self.train_epoch(epoch)
 
             val_metrics = self.emotion_evaluator.validate_epoch(epoch)
@@ -493,18 +709,24 @@ class EmotionalXTTSTrainer:
 
         print("Training completed!")
 
-        final_adapter_path = self.checkpoint_dir / "emotional_adapter_final.pth"
-        torch.save({
-            'va_adapter_state_dict': self.model.va_adapter.state_dict(),
-            'config': self.config,
-            'adaptive_gpt_strength': self.adaptive_gpt_strength,
-            'adaptive_speaker_strength': self.adaptive_speaker_strength,
-            'vad_feedback_history': self.vad_feedback_history
-        }, final_adapter_path)
+        self.wait_for_checkpoint()
 
-        print(f"Final emotional adapter saved to: {final_adapter_path}")
+        if self.is_main_process:
+            final_adapter_path = self.checkpoint_dir / "emotional_adapter_final.pth"
+            _atomic_save({
+                'va_adapter_state_dict': self.model.va_adapter.state_dict(),
+                'config': self.config,
+                'adaptive_gpt_strength': self.adaptive_gpt_strength,
+                'adaptive_speaker_strength': self.adaptive_speaker_strength,
+                'vad_feedback_history': self.vad_feedback_history
+            }, final_adapter_path)
+
+            print(f"Final emotional adapter saved to: {final_adapter_path}")
         print(f"Final adaptive strengths: GPT={self.adaptive_gpt_strength:.3f}, Speaker={self.adaptive_speaker_strength:.3f}")
         print(f"VAD evaluation frequency used: every {self.vad_eval_frequency} steps")
         print(f"Total VAD feedback samples collected: {len(self.vad_feedback_history)}")
 
         self.writer.close()
+
+        if self.distributed:
+            dist.destroy_process_group()
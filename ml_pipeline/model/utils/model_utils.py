@@ -184,7 +184,8 @@ def save_temp_audio(audio_tensor, sample_rate=22050):
         if isinstance(audio_tensor, np.ndarray):
             audio_tensor = torch.from_numpy(audio_tensor)
 
-        if torch.all(audio_tensor == 0) or torch.max(torch.abs(audio_tensor)) == 0:
+        min_val, max_val = torch.aminmax(audio_tensor)
+        if min_val == 0 and max_val == 0:
             print("Warning: Generated audio is silence - inference likely failed")
             audio_tensor = 0.1 * torch.sin(2 * 3.14159 * 440 * torch.linspace(0, 1, sample_rate))
 
@@ -248,7 +249,8 @@ def generate_audio_sample(model, text, speaker_ref, target_valence, target_arous
         if generated_audio.dim() == 2:
             generated_audio = generated_audio.squeeze(0)
 
-        audio_max = torch.max(torch.abs(generated_audio))
+        min_val, max_val = torch.aminmax(generated_audio)
+        audio_max = torch.maximum(max_val, -min_val)
         if audio_max == 0 or torch.isnan(audio_max):
             print("Warning: Generated audio is silence or contains NaN")
             sample_rate = 22050
@@ -7,14 +7,25 @@ import sys
 import logging
 import structlog
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Iterator
 import traceback
+import tarfile
+import mmap
+import threading
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from google.cloud import storage
 from google.cloud import aiplatform
 from google.auth.exceptions import GoogleAuthError
 import colorlog
 from datetime import datetime
 import time
+import functools
+
+# Multipart upload tuning, mirroring gsutil's parallel composite upload knobs
+MULTIPART_THRESHOLD = int(os.environ.get("GCP_MULTIPART_THRESHOLD", 150 * 1024 * 1024))
+MULTIPART_CHUNKSIZE = int(os.environ.get("GCP_MULTIPART_CHUNKSIZE", 150 * 1024 * 1024))
+MAX_CONCURRENCY = int(os.environ.get("GCP_MAX_CONCURRENCY", 10))
 
 
 class PipelineLogger:
@@ -91,19 +102,35 @@ class PipelineLogger:
         self.logger.debug(msg, **kwargs)
 
 
+@functools.lru_cache(maxsize=None)
+def get_storage_client(project_id: str) -> storage.Client:
+    """Process-wide storage client per project, so every manager shares one connection pool."""
+    return storage.Client(project=project_id)
+
+
 class GCPStorageManager:
     """Manager for Google Cloud Storage operations."""
     
     def __init__(self, project_id: str, logger: PipelineLogger):
         self.project_id = project_id
         self.logger = logger
-        self.client = None
-        self._authenticate()
+        # Authentication is deferred to the first GCS call so startup paths that exit early skip it
+        self._client = None
+        self._client_lock = threading.Lock()
+    
+    @property
+    def client(self) -> storage.Client:
+        """Storage client, created on first use."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._authenticate()
+        return self._client
     
     def _authenticate(self):
         """Authenticate with GCP."""
         try:
-            self.client = storage.Client(project=self.project_id)
+            self._client = get_storage_client(self.project_id)
             self.logger.info("Successfully authenticated with GCP Storage", project_id=self.project_id)
         except GoogleAuthError as e:
             self.logger.error("Failed to authenticate with GCP", error=str(e))
@@ -112,10 +139,77 @@ class GCPStorageManager:
             self.logger.error("Unexpected error during GCP authentication", error=str(e))
             raise
     
+    def list_blob_names(self, bucket_name: str, prefix: str = "", page_size: int = 1000,
+                        max_results: Optional[int] = None) -> Iterator[str]:
+        """Lazily yield object names under a prefix, one page at a time."""
+        # Only names are requested, which keeps each listing page small
+        blobs = self.client.list_blobs(
+            bucket_name,
+            prefix=prefix,
+            page_size=page_size,
+            max_results=max_results,
+            fields="items(name),nextPageToken"
+        )
+        for blob in blobs:
+            yield blob.name
+    
+    def upload_files(self, items: List[Tuple[str, str, str]], max_workers: int = 10) -> bool:
+        """Upload (bucket_name, local_file, blob_name) triples concurrently."""
+        def upload(bucket_name: str, local_file: str, blob_name: str):
+            if os.path.getsize(local_file) > MULTIPART_THRESHOLD:
+                if not self.upload_file_parallel(bucket_name, local_file, blob_name):
+                    raise RuntimeError(f"Multipart upload failed: {local_file}")
+            else:
+                self.client.bucket(bucket_name).blob(blob_name).upload_from_filename(local_file)
+        
+        try:
+            # storage.Client is thread-safe; all workers share its connection pool
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(upload, *item) for item in items]
+                # as_completed surfaces the first failure without waiting for the rest of the batch
+                for future in as_completed(futures):
+                    future.result()
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(
+                "Failed to upload files to GCS",
+                files=len(items),
+                error=str(e),
+                traceback=traceback.format_exc()
+            )
+            return False
+    
+    def download_files(self, items: List[Tuple[str, str, str]], max_workers: int = 32) -> bool:
+        """Download (bucket_name, blob_name, local_file) triples concurrently."""
+        def download(bucket_name: str, blob_name: str, local_file: str):
+            self.client.bucket(bucket_name).blob(blob_name).download_to_filename(local_file)
+        
+        try:
+            for parent in {Path(local_file).parent for _, _, local_file in items}:
+                parent.mkdir(parents=True, exist_ok=True)
+            
+            # Per-connection GCS throughput is limited; concurrent streams keep the link busy
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(download, *item) for item in items]
+                for future in as_completed(futures):
+                    future.result()
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(
+                "Failed to download files from GCS",
+                files=len(items),
+                error=str(e),
+                traceback=traceback.format_exc()
+            )
+            return False
+    
     def upload_directory(self, local_dir: str, bucket_name: str, prefix: str = "") -> bool:
         """Upload entire directory to GCS bucket."""
         try:
-            bucket = self.client.bucket(bucket_name)
             local_path = Path(local_dir)
             
             if not local_path.exists():
@@ -127,10 +221,10 @@ class GCPStorageManager:
                 if file_path.is_file():
                     relative_path = file_path.relative_to(local_path)
                     blob_name = f"{prefix}/{relative_path}" if prefix else str(relative_path)
-                    
-                    blob = bucket.blob(blob_name)
-                    blob.upload_from_filename(str(file_path))
-                    uploaded_files.append(blob_name)
+                    uploaded_files.append((bucket_name, str(file_path), blob_name))
+            
+            if not self.upload_files(uploaded_files):
+                return False
             
             self.logger.info(
                 "Successfully uploaded directory to GCS", 
@@ -150,23 +244,21 @@ class GCPStorageManager:
             )
             return False
     
-    def download_directory(self, bucket_name: str, prefix: str, local_dir: str) -> bool:
+    def download_directory(self, bucket_name: str, prefix: str, local_dir: str,
+                           max_workers: int = 32) -> bool:
         """Download directory from GCS bucket."""
         try:
-            bucket = self.client.bucket(bucket_name)
             local_path = Path(local_dir)
             local_path.mkdir(parents=True, exist_ok=True)
             
-            blobs = bucket.list_blobs(prefix=prefix)
             downloaded_files = []
+            for blob_name in self.list_blob_names(bucket_name, prefix):
+                if not blob_name.endswith('/'):  # Skip directories
+                    local_file_path = local_path / blob_name.replace(prefix, "").lstrip('/')
+                    downloaded_files.append((bucket_name, blob_name, str(local_file_path)))
             
-            for blob in blobs:
-                if not blob.name.endswith('/'):  # Skip directories
-                    local_file_path = local_path / blob.name.replace(prefix, "").lstrip('/')
-                    local_file_path.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    blob.download_to_filename(str(local_file_path))
-                    downloaded_files.append(str(local_file_path))
+            if not self.download_files(downloaded_files, max_workers=max_workers):
+                return False
             
             self.logger.info(
                 "Successfully downloaded directory from GCS", 
@@ -189,6 +281,222 @@ class GCPStorageManager:
             return False
 
 
+    def upload_directory_sharded(self, local_dir: str, bucket_name: str, prefix: str = "",
+                                 files_per_shard: int = 5000,
+                                 exclude_dirs: Tuple[str, ...] = ("cache",)) -> bool:
+        """Upload directory as sequential tar shards instead of one object per file."""
+        try:
+            bucket = self.client.bucket(bucket_name)
+            local_path = Path(local_dir)
+            
+            if not local_path.exists():
+                self.logger.error("Local directory does not exist", local_dir=local_dir)
+                return False
+            
+            # Top-level local caches (e.g. a processed/cache/ left by older runs) are never published
+            files = sorted(
+                p for p in local_path.rglob("*")
+                if p.is_file() and p.relative_to(local_path).parts[0] not in exclude_dirs
+            )
+            uploaded_shards = []
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                for start in range(0, len(files), files_per_shard):
+                    shard_name = f"shard-{start // files_per_shard:06d}.tar"
+                    shard_path = Path(tmp_dir) / shard_name
+                    
+                    with tarfile.open(shard_path, "w") as tar:
+                        for file_path in files[start:start + files_per_shard]:
+                            tar.add(str(file_path), arcname=file_path.relative_to(local_path).as_posix())
+                    
+                    blob_name = f"{prefix}/{shard_name}" if prefix else shard_name
+                    if not self.upload_file_parallel(bucket_name, str(shard_path), blob_name):
+                        return False
+                    shard_path.unlink()
+                    uploaded_shards.append(blob_name)
+            
+            # Shards left over from an earlier, larger upload would otherwise be unpacked on download
+            for blob_name in self.list_blob_names(bucket_name, prefix):
+                if blob_name.endswith('.tar') and blob_name not in uploaded_shards:
+                    bucket.blob(blob_name).delete()
+            
+            self.logger.info(
+                "Successfully uploaded sharded directory to GCS",
+                local_dir=local_dir,
+                bucket=bucket_name,
+                files_uploaded=len(files),
+                shards_uploaded=len(uploaded_shards)
+            )
+            return True
+            
+        except Exception as e:
+            self.logger.error(
+                "Failed to upload sharded directory to GCS",
+                local_dir=local_dir,
+                bucket=bucket_name,
+                error=str(e),
+                traceback=traceback.format_exc()
+            )
+            return False
+    
+    def upload_file_parallel(self, bucket_name: str, local_file: str, blob_name: str,
+                             num_streams: int = MAX_CONCURRENCY,
+                             chunk_size: int = MULTIPART_CHUNKSIZE) -> bool:
+        """Upload a large file as concurrent parts composed server-side into one object."""
+        part_blobs = []
+        try:
+            bucket = self.client.bucket(bucket_name)
+            file_size = os.path.getsize(local_file)
+            
+            if file_size <= max(chunk_size, MULTIPART_THRESHOLD):
+                bucket.blob(blob_name).upload_from_filename(local_file)
+                return True
+            
+            # A single compose request accepts at most 32 source objects
+            chunk_size = max(chunk_size, -(-file_size // 32))
+            offsets = range(0, file_size, chunk_size)
+            part_blobs = [bucket.blob(f"{blob_name}.part-{i:02d}") for i in range(len(offsets))]
+            
+            def upload_part(item):
+                part_blob, offset = item
+                # Streamed from the file slice in resumable 8 MB requests, so each worker holds one
+                # request buffer rather than a whole part
+                part_blob.chunk_size = 8 * 1024 * 1024
+                with open(local_file, "rb") as f:
+                    f.seek(offset)
+                    part_blob.upload_from_file(f, size=min(chunk_size, file_size - offset))
+            
+            # Parts are temporary objects; the finally block deletes them once composed or on failure
+            with ThreadPoolExecutor(max_workers=min(num_streams, len(part_blobs))) as executor:
+                list(executor.map(upload_part, zip(part_blobs, offsets)))
+            
+            bucket.blob(blob_name).compose(part_blobs)
+            
+            self.logger.info(
+                "Successfully uploaded file to GCS",
+                local_file=local_file,
+                bucket=bucket_name,
+                blob_name=blob_name,
+                parts=len(part_blobs)
+            )
+            return True
+            
+        except Exception as e:
+            self.logger.error(
+                "Failed to upload file to GCS",
+                local_file=local_file,
+                bucket=bucket_name,
+                blob_name=blob_name,
+                error=str(e),
+                traceback=traceback.format_exc()
+            )
+            return False
+        
+        finally:
+            for part_blob in part_blobs:
+                try:
+                    part_blob.delete()
+                except Exception:
+                    pass
+    
+    def download_file_parallel(self, bucket_name: str, blob_name: str, local_file: str,
+                               max_concurrency: int = 16) -> bool:
+        """Download a large object as concurrent ranged reads into a preallocated file."""
+        try:
+            blob = self.client.bucket(bucket_name).blob(blob_name)
+            blob.reload()
+            file_size = blob.size
+            Path(local_file).parent.mkdir(parents=True, exist_ok=True)
+            
+            if file_size <= MULTIPART_THRESHOLD:
+                blob.download_to_filename(local_file)
+                return True
+            
+            chunk_size = -(-file_size // max_concurrency)
+            offsets = range(0, file_size, chunk_size)
+            
+            with open(local_file, "wb") as f:
+                f.truncate(file_size)
+            
+            with open(local_file, "r+b") as f, mmap.mmap(f.fileno(), file_size) as mm:
+                def download_range(offset):
+                    end = min(offset + chunk_size, file_size)
+                    # The end of a ranged read is inclusive
+                    mm[offset:end] = blob.download_as_bytes(start=offset, end=end - 1)
+                
+                # Each worker writes its own disjoint slice of the mapping, so no locking is needed
+                with ThreadPoolExecutor(max_workers=len(offsets)) as executor:
+                    list(executor.map(download_range, offsets))
+            
+            self.logger.info(
+                "Successfully downloaded file from GCS",
+                bucket=bucket_name,
+                blob_name=blob_name,
+                local_file=local_file,
+                ranges=len(offsets)
+            )
+            return True
+            
+        except Exception as e:
+            self.logger.error(
+                "Failed to download file from GCS",
+                bucket=bucket_name,
+                blob_name=blob_name,
+                local_file=local_file,
+                error=str(e),
+                traceback=traceback.format_exc()
+            )
+            return False
+    
+    def download_directory_sharded(self, bucket_name: str, prefix: str, local_dir: str,
+                                   max_workers: int = 4) -> bool:
+        """Download and unpack tar shards written by upload_directory_sharded."""
+        try:
+            local_path = Path(local_dir)
+            local_path.mkdir(parents=True, exist_ok=True)
+            
+            # One listing up front; shard downloads then overlap each other and the unpacking
+            shard_names = [name for name in self.list_blob_names(bucket_name, prefix) if name.endswith('.tar')]
+            
+            # Shards share parent directories, which tarfile creates without tolerating a race
+            extract_lock = threading.Lock()
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                def fetch_shard(blob_name: str):
+                    shard_path = Path(tmp_dir) / Path(blob_name).name
+                    if not self.download_file_parallel(bucket_name, blob_name, str(shard_path)):
+                        raise RuntimeError(f"Shard download failed: {blob_name}")
+                    
+                    with extract_lock, tarfile.open(shard_path, "r") as tar:
+                        tar.extractall(local_path, filter="data")
+                    shard_path.unlink()
+                
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [executor.submit(fetch_shard, name) for name in shard_names]
+                    for future in as_completed(futures):
+                        future.result()
+            
+            self.logger.info(
+                "Successfully downloaded sharded directory from GCS",
+                bucket=bucket_name,
+                prefix=prefix,
+                local_dir=local_dir,
+                shards_downloaded=len(shard_names)
+            )
+            return True
+            
+        except Exception as e:
+            self.logger.error(
+                "Failed to download sharded directory from GCS",
+                bucket=bucket_name,
+                prefix=prefix,
+                local_dir=local_dir,
+                error=str(e),
+                traceback=traceback.format_exc()
+            )
+            return False
+
+
 class VertexAIManager:
     """Manager for Vertex AI operations."""
     
@@ -196,12 +504,16 @@ class VertexAIManager:
         self.project_id = project_id
         self.region = region
         self.logger = logger
-        self._initialize()
+        self._initialized = False
     
     def _initialize(self):
-        """Initialize Vertex AI."""
+        """Initialize Vertex AI on first use."""
+        if self._initialized:
+            return
+        
         try:
             aiplatform.init(project=self.project_id, location=self.region)
+            self._initialized = True
             self.logger.info("Successfully initialized Vertex AI", project_id=self.project_id, region=self.region)
         except Exception as e:
             self.logger.error("Failed to initialize Vertex AI", error=str(e))
@@ -210,6 +522,8 @@ class VertexAIManager:
     def upload_model(self, model_path: str, model_name: str, model_version: str = None) -> bool:
         """Upload trained model to Vertex AI Model Registry with enhanced versioning."""
         try:
+            self._initialize()
+            
             # Generate version if not provided
             if model_version is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -234,7 +548,7 @@ class VertexAIManager:
                 self.logger.info(f"Uploading local model to temporary GCS location: {temp_gcs_path}")
                 
                 # Create temporary bucket if it doesn't exist
-                storage_client = storage.Client(project=self.project_id)
+                storage_client = get_storage_client(self.project_id)
                 try:
                     bucket = storage_client.bucket(temp_bucket_name)
                     if not bucket.exists():
@@ -247,17 +561,19 @@ class VertexAIManager:
                 # Upload directory to GCS
                 if Path(model_path).is_dir():
                     # Upload directory
-                    for file_path in Path(model_path).rglob("*"):
-                        if file_path.is_file():
-                            relative_path = file_path.relative_to(model_path)
-                            blob_name = f"temp_models/{model_name}_{model_version}/{relative_path}"
-                            blob = bucket.blob(blob_name)
-                            blob.upload_from_filename(str(file_path))
+                    items = [
+                        (temp_bucket_name, str(file_path),
+                         f"temp_models/{model_name}_{model_version}/{file_path.relative_to(model_path)}")
+                        for file_path in Path(model_path).rglob("*") if file_path.is_file()
+                    ]
                 else:
                     # Upload single file
                     blob_name = f"temp_models/{model_name}_{model_version}/{Path(model_path).name}"
-                    blob = bucket.blob(blob_name)
-                    blob.upload_from_filename(str(model_path))
+                    items = [(temp_bucket_name, str(model_path), blob_name)]
+                
+                # Checkpoints above MULTIPART_THRESHOLD go up as parallel composite uploads
+                if not GCPStorageManager(self.project_id, self.logger).upload_files(items):
+                    return False
                 
                 model_path = temp_gcs_path
             
@@ -297,7 +613,7 @@ class VertexAIManager:
             # Clean up temporary GCS files if they were created
             if not model_path.startswith("gs://") and "temp_models" in model_path:
                 try:
-                    storage_client = storage.Client(project=self.project_id)
+                    storage_client = get_storage_client(self.project_id)
                     bucket = storage_client.bucket(temp_bucket_name)
                     blobs = bucket.list_blobs(prefix=f"temp_models/{model_name}_{model_version}/")
                     for blob in blobs:
@@ -353,6 +669,8 @@ class PipelineConfig:
         # Optional configuration
         config['google_application_credentials'] = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
         config['log_level'] = os.getenv('LOG_LEVEL', 'INFO')
+        # Every data worker holds its own Whisper and VAD models, so more than one is opt-in
+        config['data_num_workers'] = int(os.getenv('DATA_NUM_WORKERS', 1))
         
         self.logger.info("Configuration loaded successfully", config_keys=list(config.keys()))
         return config
@@ -5,7 +5,10 @@ Orchestrates the complete ML pipeline from data collection to model deployment.
 """
 
 import os
+import re
 import sys
+import shutil
+import fnmatch
 import subprocess
 from pathlib import Path
 from typing import Dict, Any, List
@@ -174,15 +177,24 @@ class CompletePipeline:
                 "*.pyc"
             ]
             
-            # Clean up in project root
-            for pattern in cleanup_patterns:
-                for item in self.project_root.glob(f"**/{pattern}"):
-                    try:
-                        if item.is_file():
+            cleanup_regex = re.compile("|".join(fnmatch.translate(pattern) for pattern in cleanup_patterns))
+            
+            # Clean up in project root, in a single walk rather than one recursive glob per pattern
+            for dirpath, dirnames, filenames in os.walk(self.project_root):
+                for name in filenames:
+                    if cleanup_regex.match(name):
+                        item = Path(dirpath) / name
+                        try:
                             item.unlink()
-                        elif item.is_dir():
-                            import shutil
-                            shutil.rmtree(item)
+                        except Exception as e:
+                            self.logger.warning(f"Failed to cleanup {item}", error=str(e))
+                
+                # Matching directories are removed whole and pruned from the walk
+                for name in [d for d in dirnames if cleanup_regex.match(d)]:
+                    dirnames.remove(name)
+                    item = Path(dirpath) / name
+                    try:
+                        shutil.rmtree(item)
                     except Exception as e:
                         self.logger.warning(f"Failed to cleanup {item}", error=str(e))
             
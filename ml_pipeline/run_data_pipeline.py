@@ -7,6 +7,7 @@ Handles dataset downloading, processing, and GCS uploads.
 import os
 import sys
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any
 
@@ -73,7 +74,8 @@ class DataPipeline:
         try:
             self.logger.info("Starting raw data upload to GCS")
             
-            raw_data_path = Path(__file__).parent / "data_collection" / "tts_data" / "raw"
+            # Resolved up front: this runs alongside run_data_processing, which changes the cwd
+            raw_data_path = Path(__file__).resolve().parent / "data_collection" / "tts_data" / "raw"
             if not raw_data_path.exists():
                 self.logger.error("Raw data directory not found", path=str(raw_data_path))
                 return False
@@ -114,6 +116,7 @@ class DataPipeline:
             
             config = ProcessorConfig(
                 output_dir=str(Path(__file__).parent / "pipeline_data" / "processed"),
+                cache_dir=str(Path(__file__).parent / "pipeline_data" / "cache"),
                 input_datasets={
                     "emovdb": str(raw_data_path / "emovdb"),
                     "iemocap": str(raw_data_path / "iemocap" / "data"),
@@ -126,7 +129,8 @@ class DataPipeline:
                 max_duration=30.0,
                 min_transcript_length=3,
                 verbose=True,
-                progress_interval=100
+                progress_interval=100,
+                num_workers=self.config.get('data_num_workers', 1)
             )
             
             processor = UniversalAudioProcessor(config)
@@ -169,7 +173,7 @@ class DataPipeline:
                 self.logger.error("Processed data directory not found", path=str(processed_data_path))
                 return False
             
-            success = self.storage_manager.upload_directory(
+            success = self.storage_manager.upload_directory_sharded(
                 str(processed_data_path),
                 self.config.get('gcs_processed_data_bucket'),
                 "processed_datasets"
@@ -195,12 +199,20 @@ class DataPipeline:
             if not self.run_data_collection():
                 return handle_pipeline_error(self.logger, Exception("Data collection failed"), "data_collection")
             
-            # Step 2: Upload Raw Data
-            if not self.upload_raw_data():
+            # Steps 2 and 3 only read the raw data, so the (network-bound) raw upload runs
+            # in the background while the (compute-bound) processing runs
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                # Step 2: Upload Raw Data
+                raw_upload = executor.submit(self.upload_raw_data)
+                
+                # Step 3: Data Processing
+                processing_ok = self.run_data_processing()
+                raw_upload_ok = raw_upload.result()
+            
+            if not raw_upload_ok:
                 return handle_pipeline_error(self.logger, Exception("Raw data upload failed"), "raw_data_upload")
             
-            # Step 3: Data Processing
-            if not self.run_data_processing():
+            if not processing_ok:
                 return handle_pipeline_error(self.logger, Exception("Data processing failed"), "data_processing")
             
             # Step 4: Upload Processed Data
@@ -48,7 +48,7 @@ class TrainingPipeline:
             
             processed_data_path = Path(__file__).parent / "pipeline_data" / "processed"
             
-            success = self.storage_manager.download_directory(
+            success = self.storage_manager.download_directory_sharded(
                 self.config.get('gcs_processed_data_bucket'),
                 "processed_datasets",
                 str(processed_data_path)
@@ -83,16 +83,20 @@ class TrainingPipeline:
             if processed_data_path.exists():
                 for item in processed_data_path.iterdir():
                     target_path = training_data_path / item.name
-                    if target_path.exists():
-                        if target_path.is_dir():
-                            shutil.rmtree(target_path)
-                        else:
-                            target_path.unlink()
+                    # is_symlink first: a link must be unlinked, never rmtree'd through to its source
+                    if target_path.is_symlink() or target_path.is_file():
+                        target_path.unlink()
+                    elif target_path.is_dir():
+                        shutil.rmtree(target_path)
                     
-                    if item.is_dir():
-                        shutil.copytree(item, target_path)
-                    else:
-                        shutil.copy2(item, target_path)
+                    # Symlinks leave the audio where it was downloaded instead of duplicating the dataset
+                    try:
+                        target_path.symlink_to(item.resolve(), target_is_directory=item.is_dir())
+                    except OSError:
+                        if item.is_dir():
+                            shutil.copytree(item, target_path)
+                        else:
+                            shutil.copy2(item, target_path)
             
             self.logger.info("Training data preparation completed successfully")
             return True
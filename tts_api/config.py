@@ -10,6 +10,9 @@ class Config:
 
     SAMPLE_RATE = 24000
 
+    HALF_PRECISION = os.getenv("HALF_PRECISION", "false").lower() == "true"
+    TORCH_COMPILE = os.getenv("TORCH_COMPILE", "false").lower() == "true"
+
     SUPPORTED_LANGUAGES = [
         "en", "es", "fr", "de", "it", "pt", "pl", "tr", "ru",
         "nl", "cs", "ar", "zh-cn", "ja", "hu", "ko", "hi"
@@ -40,15 +40,23 @@ async def lifespan(app: FastAPI):
 
     try:
         logger.info("Loading XTTS model...")
-        model = ValenceArousalXTTS(local_model_dir=Config.MODEL_DIR)
+        model = ValenceArousalXTTS(
+            local_model_dir=Config.MODEL_DIR,
+            device='cuda' if torch.cuda.is_available() else None
+        )
 
         if torch.cuda.is_available():
             model = model.cuda()
-            logger.info("Model loaded on GPU")
+            model.use_half_precision = Config.HALF_PRECISION
+            logger.info(f"Model loaded on GPU (half precision: {Config.HALF_PRECISION})")
         else:
             logger.info("Model loaded on CPU")
 
         model.load_valence_arousal_adapter(Config.ADAPTER_PATH)
+
+        if Config.TORCH_COMPILE:
+            model.compile_hot_paths()
+
         logger.info("✅ Model loaded successfully")
 
     except Exception as e:
@@ -129,7 +137,9 @@ async def synthesize_speech_with_reference(
             audio_output = model.inference_with_valence_arousal(
                 text=text,
                 language=language,
+                audio_path=None,
                 audio_tensor=audio_tensor,
+                sample_rate=sample_rate,
                 valence=valence,
                 arousal=arousal,
                 temperature=temperature,
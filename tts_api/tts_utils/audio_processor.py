@@ -7,8 +7,8 @@ from typing import Tuple, Dict, Union, Optional
 import numpy as np
 import torch
 import torchaudio
-import librosa
 import soundfile as sf
+import soxr
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
@@ -123,15 +123,19 @@ class AudioProcessor:
         try:
             audio_buffer = io.BytesIO(audio_bytes)
 
-            audio_array, sr = librosa.load(
-                audio_buffer,
-                sr=self.target_sample_rate,
-                mono=True,
-                dtype=np.float32
-            )
+            # libsndfile decode + soxr resample; get_audio_info has already checked libsndfile can read it
+            audio_array, sr = sf.read(audio_buffer, dtype='float32', always_2d=False)
+
+            if audio_array.ndim == 2:
+                audio_array = audio_array.mean(axis=1, dtype=np.float32)
+
+            if sr != self.target_sample_rate:
+                audio_array = soxr.resample(audio_array, sr, self.target_sample_rate, quality='HQ')
+                sr = self.target_sample_rate
 
-            if np.max(np.abs(audio_array)) > 0:
-                audio_array = audio_array / np.max(np.abs(audio_array)) * 0.95
+            peak = max(audio_array.max(), -audio_array.min())
+            if peak > 0:
+                np.multiply(audio_array, 0.95 / peak, out=audio_array)
 
             audio_tensor = torch.from_numpy(audio_array)
 
@@ -2,9 +2,11 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import numpy as np
-import tempfile
 import os
+import hashlib
+import itertools
 import torchaudio
+from collections import OrderedDict
 
 from tts_utils.model_utils import (
     load_xtts_model,
@@ -19,6 +21,33 @@ from TTS.tts.layers.xtts.dvae import DiscreteVAE
 from TTS.tts.layers.tortoise.arch_utils import TorchMelSpectrogram
 
 
+# Cross-entropy's default ignore_index, so padded token positions drop out of the loss
+DVAE_PAD_TOKEN = -100
+
+
+def _with_eager_fallback(compiled, eager, name):
+    """Call `compiled`, switching to `eager` for good if torch.compile fails on it.
+
+    Only compiler errors are caught, and only for this callable (unlike dynamo's process-wide
+    suppress_errors); errors raised by the model code itself still propagate.
+    """
+    import torch._dynamo.exc
+
+    state = {'fn': compiled}
+
+    def call(*args, **kwargs):
+        if state['fn'] is eager:
+            return eager(*args, **kwargs)
+        try:
+            return compiled(*args, **kwargs)
+        except torch._dynamo.exc.TorchDynamoException as e:
+            print(f"⚠️  torch.compile failed for {name}, running eagerly: {e}")
+            state['fn'] = eager
+            return eager(*args, **kwargs)
+
+    return call
+
+
 class ValenceArousalAdapter(nn.Module):
     def __init__(self, emotion_dim=256, latent_dim=1024):
         super().__init__()
@@ -26,26 +55,40 @@ class ValenceArousalAdapter(nn.Module):
         # Valence-arousal input layer (2 inputs: valence, arousal)
         self.va_encoder = nn.Sequential(
             nn.Linear(2, emotion_dim),
-            nn.ReLU(),
+            nn.ReLU(inplace=True),
             nn.Linear(emotion_dim, emotion_dim)
         )
 
         self.gpt_latent_transform = nn.Sequential(
             nn.Linear(latent_dim + emotion_dim, latent_dim),
-            nn.ReLU(),
+            nn.ReLU(inplace=True),
             nn.Linear(latent_dim, latent_dim),
             nn.Tanh()
         )
 
         self.speaker_embed_transform = nn.Sequential(
             nn.Linear(512 + emotion_dim, 512),
-            nn.ReLU(),
+            nn.ReLU(inplace=True),
             nn.Linear(512, 512),
             nn.Tanh()
         )
 
         self.emotion_gate = nn.Parameter(torch.tensor(0.3))
 
+    @staticmethod
+    def pack_valence_arousal(valence, arousal, device):
+        """[batch, 2] adapter input built on the host and uploaded with a single copy"""
+        if not isinstance(valence, torch.Tensor) and not isinstance(arousal, torch.Tensor):
+            va_input = torch.tensor([[valence, arousal]], dtype=torch.float32)
+            if device.type == 'cuda':
+                va_input = va_input.pin_memory()
+            return va_input.to(device, non_blocking=True)
+
+        valence = torch.as_tensor(valence, dtype=torch.float32)
+        arousal = torch.as_tensor(arousal, dtype=torch.float32, device=valence.device)
+        va_input = torch.stack([valence.reshape(-1), arousal.reshape(-1)], dim=1)
+        return va_input if va_input.device == device else va_input.to(device, non_blocking=True)
+
     def forward(self, gpt_cond_latent, speaker_embedding, valence, arousal):
         device = gpt_cond_latent.device
 
@@ -66,26 +109,13 @@ class ValenceArousalAdapter(nn.Module):
         elif speaker_embedding.dim() == 1:
             speaker_embedding = speaker_embedding.unsqueeze(0)
 
-        if not isinstance(valence, torch.Tensor):
-            valence = torch.tensor(valence, dtype=torch.float32, device=device)
-        else:
-            valence = valence.to(device)
-
-        if not isinstance(arousal, torch.Tensor):
-            arousal = torch.tensor(arousal, dtype=torch.float32, device=device)
-        else:
-            arousal = arousal.to(device)
+        va_input = self.pack_valence_arousal(valence, arousal, device)  # [batch_size, 2]
 
-        speaker_embedding = speaker_embedding.to(device)
+        if speaker_embedding.device != device:
+            speaker_embedding = speaker_embedding.to(device, non_blocking=True)
 
-        if valence.dim() == 0:
-            valence = valence.unsqueeze(0)
-        if arousal.dim() == 0:
-            arousal = arousal.unsqueeze(0)
+        batch_size = va_input.shape[0]
 
-        batch_size = valence.shape[0]
-
-        va_input = torch.stack([valence, arousal], dim=1)  # [batch_size, 2]
         emotion_emb = self.va_encoder(va_input)  # [batch_size, emotion_dim]
 
         if gpt_cond_latent.shape[0] != batch_size:
@@ -120,7 +150,7 @@ class ValenceArousalAdapter(nn.Module):
 
 
 class ValenceArousalXTTS(nn.Module):
-    def __init__(self, config_path=None, checkpoint_path=None, local_model_dir="./models/xtts_v2"):
+    def __init__(self, config_path=None, checkpoint_path=None, local_model_dir="./models/xtts_v2", device=None):
         super().__init__()
 
         self.local_model_dir = local_model_dir
@@ -162,7 +192,16 @@ class ValenceArousalXTTS(nn.Module):
 
         self.dvae = None
         self.mel_converter = None
-        self._init_dvae_and_mel_converter()
+        self._init_dvae_and_mel_converter(device)
+
+        self._resamplers = {}
+        self._cond_cache = OrderedDict()
+        self.cond_cache_size = 32
+
+        # fp16 autocast for the XTTS decode on CUDA (bf16 output cannot go through XTTS's .numpy())
+        self.use_half_precision = False
+
+        self._cond_stream = None
 
         print("ValenceArousalXTTS initialization complete!")
 
@@ -212,7 +251,13 @@ class ValenceArousalXTTS(nn.Module):
             else:
                 print(f"{name}: not a tensor, type={type(tensor)}")
 
-    def _init_dvae_and_mel_converter(self):
+    def _init_dvae_and_mel_converter(self, device=None):
+        """Build the DVAE on `device` (when known) and load its weights straight there"""
+        device = torch.device(device) if device is not None else torch.device('cpu')
+        if device.type == 'mps':
+            # to() decides whether the DVAE can actually run on MPS
+            device = torch.device('cpu')
+
         try:
             dvae_path = os.path.join(self.local_model_dir, "dvae.pth")
             mel_stats_path = os.path.join(self.local_model_dir, "mel_stats.pth")
@@ -225,19 +270,20 @@ class ValenceArousalXTTS(nn.Module):
                 print(f"Error: mel_stats.pth not found at {mel_stats_path}")
                 return
 
-            self.dvae = DiscreteVAE(
-                channels=80, normalization=None, positional_dims=1, num_tokens=1024,
-                codebook_dim=512, hidden_dim=512, num_resnet_blocks=3, kernel_size=3,
-                num_layers=2, use_transposed_convs=False,
-            )
+            with device:
+                self.dvae = DiscreteVAE(
+                    channels=80, normalization=None, positional_dims=1, num_tokens=1024,
+                    codebook_dim=512, hidden_dim=512, num_resnet_blocks=3, kernel_size=3,
+                    num_layers=2, use_transposed_convs=False,
+                )
 
-            self.dvae.load_state_dict(torch.load(dvae_path, map_location='cpu'), strict=False)
+            self.dvae.load_state_dict(torch.load(dvae_path, map_location=device, weights_only=True), strict=False)
             self.dvae.eval()
 
             self.mel_converter = TorchMelSpectrogram(
                 mel_norm_file=mel_stats_path,
                 sampling_rate=22050
-            )
+            ).to(device)
 
             print("✅ DVAE and mel converter initialized successfully")
 
@@ -251,11 +297,13 @@ class ValenceArousalXTTS(nn.Module):
             if self.dvae is None or self.mel_converter is None:
                 raise RuntimeError("DVAE or mel converter not initialized. Check dvae.pth and mel_stats.pth paths.")
 
-            device = next(self.parameters()).device
+            # Mel converter and DVAE share a device; the audio goes straight there
+            device = next(self.dvae.parameters()).device
 
             if audio_tensor.dim() == 1:
                 audio_tensor = audio_tensor.unsqueeze(0)  # Add channel dim
-            audio_tensor = audio_tensor.to(device)
+            if audio_tensor.device != device:
+                audio_tensor = audio_tensor.to(device, non_blocking=True)
 
             mel = self.mel_converter(audio_tensor.unsqueeze(0))  # Add batch dim for mel converter
 
@@ -263,7 +311,7 @@ class ValenceArousalXTTS(nn.Module):
             if remainder:
                 mel = mel[:, :, :-remainder]
 
-            with torch.no_grad():
+            with torch.inference_mode():
                 tokens = self.dvae.get_codebook_indices(mel)
                 return tokens.squeeze(0)  # Remove batch dim
 
@@ -272,122 +320,168 @@ class ValenceArousalXTTS(nn.Module):
             return None
 
     def extract_dvae_tokens_batch(self, audio_batch):
+        """DVAE tokens for a list of waveforms from one padded mel + DVAE forward pass.
+
+        Returns a (B, T_max) token tensor padded with DVAE_PAD_TOKEN and the per-sample token lengths.
+        """
         try:
             if self.dvae is None or self.mel_converter is None:
                 raise RuntimeError("DVAE or mel converter not initialized. Check dvae.pth and mel_stats.pth paths.")
 
-            tokens_list = []
-            failed_samples = []
+            device = next(self.dvae.parameters()).device
+
+            audio_batch = [audio.reshape(-1) for audio in audio_batch]
+            lengths = [audio.numel() for audio in audio_batch]
 
+            padded = torch.zeros(len(audio_batch), max(lengths), device=device)
             for i, audio in enumerate(audio_batch):
-                tokens = self.extract_dvae_tokens(audio)
-                if tokens is not None:
-                    tokens_list.append(tokens)
-                else:
-                    failed_samples.append(i)
+                padded[i, :lengths[i]] = audio
 
-            if failed_samples:
-                raise ValueError(
-                    f"Token extraction failed for samples: {failed_samples}. Cannot train with incomplete ground truth.")
+            mel = self.mel_converter(padded)
+            mel = mel[:, :, :mel.shape[-1] - mel.shape[-1] % 4]
+
+            with torch.inference_mode():
+                tokens = self.dvae.get_codebook_indices(mel)
 
-            return tokens_list
+                # The centered STFT gives length // hop + 1 frames, which the DVAE downsamples by 4
+                hop_length = self.mel_converter.hop_length
+                token_lengths = torch.tensor(
+                    [(length // hop_length + 1) // 4 for length in lengths], device=tokens.device
+                ).clamp_(max=tokens.shape[1])
+
+                # Already one (B, T_max) tensor: mark each sample's tail as padding in place.
+                # This stays inside inference_mode, where in-place updates to inference tensors are allowed
+                padding = torch.arange(tokens.shape[1], device=tokens.device) >= token_lengths.unsqueeze(1)
+                tokens.masked_fill_(padding, DVAE_PAD_TOKEN)
+            return tokens, token_lengths
 
         except Exception as e:
             print(f"CRITICAL: Batch token extraction failed: {e}")
             raise e
 
-    def _prepare_audio_tensor(self, audio_tensor):
-        if audio_tensor.dim() == 3:
-            audio_tensor = audio_tensor.squeeze(0)
-        if audio_tensor.dim() == 2:
-            audio_tensor = audio_tensor.squeeze(0)
-
-        if audio_tensor.dim() != 1:
-            raise ValueError(f"Expected 1D audio tensor, got {audio_tensor.dim()}D")
-
-        return audio_tensor.cpu()
-
-    def _create_temp_audio_file(self, audio_tensor):
-        temp_file_obj = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-        temp_path = temp_file_obj.name
-        temp_file_obj.close()
+    def _get_conditioning_latents_from_tensor(self, audio_tensor, sample_rate=None, max_ref_length=30,
+                                              gpt_cond_len=6, gpt_cond_chunk_len=6):
+        """xtts.get_conditioning_latents for an in-memory waveform, without the temp wav round-trip"""
+        xtts_sample_rate = DEFAULT_XTTS_CONFIG["sample_rate"]
+        audio = audio_tensor.reshape(-1).to(self.xtts.device, dtype=torch.float32)
+
+        if sample_rate is not None and sample_rate != xtts_sample_rate:
+            key = (sample_rate, audio.device)
+            if key not in self._resamplers:
+                self._resamplers[key] = torchaudio.transforms.Resample(
+                    sample_rate, xtts_sample_rate
+                ).to(audio.device)
+            audio = self._resamplers[key](audio)
+
+        # Same clipping and reference-length limit XTTS applies to audio it loads from disk
+        audio = audio.clamp(-1.0, 1.0)[:xtts_sample_rate * max_ref_length].unsqueeze(0)
+
+        speaker_embedding = self.xtts.get_speaker_embedding(audio, xtts_sample_rate)
+        gpt_cond_latent = self.xtts.get_gpt_cond_latents(
+            audio, xtts_sample_rate, length=gpt_cond_len, chunk_length=gpt_cond_chunk_len
+        )
+        return gpt_cond_latent, speaker_embedding
 
-        try:
-            audio_to_save = audio_tensor.unsqueeze(0) if audio_tensor.dim() == 1 else audio_tensor
-            torchaudio.save(temp_path, audio_to_save, DEFAULT_XTTS_CONFIG["sample_rate"])
-            return temp_path
-        except Exception as e:
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
-            raise e
+    def _get_cond_stream(self):
+        """Side CUDA stream for reference encoding; None (a no-op for torch.cuda.stream) off CUDA"""
+        device = next(self.parameters()).device
+        if device.type != 'cuda':
+            return None
 
-    def _cleanup_temp_file(self, temp_path):
-        try:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-        except Exception as e:
-            print(f"Warning: Could not delete temporary file {temp_path}: {e}")
+        if self._cond_stream is None or self._cond_stream.device != device:
+            self._cond_stream = torch.cuda.Stream(device)
+        return self._cond_stream
 
-    def get_conditioning_latents_with_valence_arousal(self, audio_input, valence, arousal, training=False):
+    def get_original_conditioning_latents(self, audio_input, training=False, sample_rate=None):
+        """Frozen XTTS conditioning latents; compute once per reference and reuse"""
         device = next(self.parameters()).device
 
-        temp_path = None
-        try:
-            if training and isinstance(audio_input, torch.Tensor):
-                audio_input = self._prepare_audio_tensor(audio_input)
-                temp_path = self._create_temp_audio_file(audio_input)
-                audio_path_for_xtts = [temp_path]
+        # XTTS is frozen, so outside training the latents only depend on the reference audio
+        cache_key = None if training else self._conditioning_cache_key(audio_input, sample_rate)
+        if cache_key is not None and cache_key in self._cond_cache:
+            self._cond_cache.move_to_end(cache_key)
+            return self._cond_cache[cache_key]
+
+        with torch.inference_mode(not training):
+            if isinstance(audio_input, torch.Tensor):
+                original_gpt_cond_latent, original_speaker_embedding = self._get_conditioning_latents_from_tensor(
+                    audio_input, sample_rate=sample_rate
+                )
 
             elif isinstance(audio_input, (str, list)):
                 audio_path_for_xtts = audio_input if isinstance(audio_input, list) else [audio_input]
-            else:
-                raise ValueError(f"Unsupported audio_input type: {type(audio_input)}")
-
-            if training:
                 original_gpt_cond_latent, original_speaker_embedding = self.xtts.get_conditioning_latents(
                     audio_path=audio_path_for_xtts
                 )
             else:
-                with torch.no_grad():
-                    original_gpt_cond_latent, original_speaker_embedding = self.xtts.get_conditioning_latents(
-                        audio_path=audio_path_for_xtts
-                    )
+                raise ValueError(f"Unsupported audio_input type: {type(audio_input)}")
+
+        # XTTS normally returns these on device already; only copy when it did not
+        if original_gpt_cond_latent.device != device:
+            original_gpt_cond_latent = original_gpt_cond_latent.to(device, non_blocking=True)
+        if original_speaker_embedding.device != device:
+            original_speaker_embedding = original_speaker_embedding.to(device, non_blocking=True)
+        latents = original_gpt_cond_latent, original_speaker_embedding
 
-        finally:
-            if temp_path is not None:
-                self._cleanup_temp_file(temp_path)
+        if cache_key is not None:
+            self._cond_cache[cache_key] = latents
+            if len(self._cond_cache) > self.cond_cache_size:
+                self._cond_cache.popitem(last=False)
 
-        original_gpt_cond_latent = original_gpt_cond_latent.to(device)
-        original_speaker_embedding = original_speaker_embedding.to(device)
+        return latents
 
-        if not isinstance(valence, torch.Tensor):
-            valence = torch.tensor(valence, dtype=torch.float32, device=device)
-        else:
-            valence = valence.to(device)
+    def _conditioning_cache_key(self, audio_input, sample_rate=None):
+        """Paths are keyed by modification time, tensors by a digest of their samples"""
+        device = str(next(self.parameters()).device)
 
-        if not isinstance(arousal, torch.Tensor):
-            arousal = torch.tensor(arousal, dtype=torch.float32, device=device)
-        else:
-            arousal = arousal.to(device)
+        if isinstance(audio_input, torch.Tensor):
+            samples = audio_input.detach().cpu().numpy().tobytes()
+            return hashlib.blake2b(samples, digest_size=16).hexdigest(), sample_rate, device
+
+        if not isinstance(audio_input, (str, list)):
+            return None
 
+        paths = audio_input if isinstance(audio_input, list) else [audio_input]
+        return tuple((path, os.path.getmtime(path)) for path in paths), device
+
+    def get_conditioning_latents_with_valence_arousal(self, audio_input, valence, arousal, training=False,
+                                                      sample_rate=None):
+        original_gpt_cond_latent, original_speaker_embedding = self.get_original_conditioning_latents(
+            audio_input, training=training, sample_rate=sample_rate
+        )
+
+        # The adapter packs valence/arousal into one tensor and uploads it once
         emotion_gpt_latent, emotion_speaker_embedding = self.va_adapter(
             original_gpt_cond_latent, original_speaker_embedding, valence, arousal
         )
 
         return emotion_gpt_latent, emotion_speaker_embedding
 
-    def inference_with_valence_arousal(self, text, language, audio_path, valence, arousal, **kwargs):
+    def inference_with_valence_arousal(self, text, language, audio_path, valence, arousal,
+                                       audio_tensor=None, sample_rate=None, **kwargs):
         if language not in DEFAULT_XTTS_CONFIG["supported_languages"]:
             language = "en"
 
         print(f"Generating speech with valence: {valence}, arousal: {arousal}")
 
         try:
-            gpt_cond_latent, speaker_embedding = self.get_conditioning_latents_with_valence_arousal(
-                audio_path, valence, arousal, training=False
-            )
+            cond_stream = self._get_cond_stream()
+            if cond_stream is not None:
+                cond_stream.wait_stream(torch.cuda.current_stream())
+
+            with torch.inference_mode(), torch.cuda.stream(cond_stream):
+                gpt_cond_latent, speaker_embedding = self.get_conditioning_latents_with_valence_arousal(
+                    audio_tensor if audio_tensor is not None else audio_path, valence, arousal,
+                    training=False, sample_rate=sample_rate
+                )
+
+            if cond_stream is not None:
+                # Only the GPU waits for the conditioning kernels; the host goes straight on to
+                # XTTS's text tokenization below
+                current_stream = torch.cuda.current_stream()
+                current_stream.wait_stream(cond_stream)
+                gpt_cond_latent.record_stream(current_stream)
+                speaker_embedding.record_stream(current_stream)
 
             if gpt_cond_latent.dim() == 2:
                 gpt_cond_latent = gpt_cond_latent.unsqueeze(0)
@@ -399,13 +493,21 @@ class ValenceArousalXTTS(nn.Module):
 
             assert gpt_cond_latent.dim() == 3, f"GPT latent should be 3D, got {gpt_cond_latent.dim()}D: {gpt_cond_latent.shape}"
 
-            return self.xtts.inference(
-                text,
-                language,
-                gpt_cond_latent,
-                speaker_embedding,
-                **kwargs
-            )
+            # The adapter above stays in fp32; only the XTTS decode is autocast when enabled
+            use_autocast = self.use_half_precision and gpt_cond_latent.device.type == 'cuda'
+            with torch.inference_mode(), torch.autocast('cuda', dtype=torch.float16, enabled=use_autocast):
+                output = self.xtts.inference(
+                    text,
+                    language,
+                    gpt_cond_latent,
+                    speaker_embedding,
+                    **kwargs
+                )
+
+            if use_autocast and isinstance(output, dict) and 'wav' in output:
+                output['wav'] = np.asarray(output['wav'], dtype=np.float32)
+
+            return output
         except Exception as e:
             print(f"Error during inference: {e}")
             print(f"GPT latent shape: {gpt_cond_latent.shape if 'gpt_cond_latent' in locals() else 'undefined'}")
@@ -413,6 +515,25 @@ class ValenceArousalXTTS(nn.Module):
                 f"Speaker embedding shape: {speaker_embedding.shape if 'speaker_embedding' in locals() else 'undefined'}")
             raise e
 
+    def compile_hot_paths(self):
+        """torch.compile the VA adapter and the DVAE encoder; anything that fails to compile runs eagerly"""
+        try:
+            # Compiling forward (not wrapping the module) keeps the adapter's state_dict keys
+            # mode="default": reduce-overhead's CUDA graphs re-record on every new batch size
+            eager_forward = self.va_adapter.forward
+            self.va_adapter.forward = _with_eager_fallback(
+                torch.compile(eager_forward, mode="default", dynamic=False), eager_forward, "VA adapter"
+            )
+            if self.dvae is not None:
+                # Mel length varies with the clip, so the encoder is compiled for dynamic shapes
+                eager_encode = self.dvae.get_codebook_indices
+                self.dvae.get_codebook_indices = _with_eager_fallback(
+                    torch.compile(eager_encode, dynamic=True), eager_encode, "DVAE encoder"
+                )
+            print("✅ VA adapter and DVAE encoder compiled")
+        except Exception as e:
+            print(f"⚠️  torch.compile unavailable, running eagerly: {e}")
+
     def unfreeze_valence_arousal_adapter(self):
         freeze_model_parameters(self.va_adapter, freeze=False)
         print("Valence-arousal adapter unfrozen for training")
@@ -420,8 +541,10 @@ class ValenceArousalXTTS(nn.Module):
     def unfreeze_last_n_gpt_layers(self, n=2):
         gpt_layers = self.xtts.gpt.gpt.layers
 
-        for layer in gpt_layers[-n:]:
-            freeze_model_parameters(layer, freeze=False)
+        # One flat walk over the selected layers' parameters; n=0 must not slice to the whole stack
+        layers = gpt_layers[len(gpt_layers) - n:] if n > 0 else []
+        for param in itertools.chain.from_iterable(layer.parameters() for layer in layers):
+            param.requires_grad_(True)
 
         print(f"Last {n} GPT layers unfrozen for fine-tuning")
 
@@ -445,7 +568,7 @@ class ValenceArousalXTTS(nn.Module):
         print(f"Valence-arousal adapter saved to {save_path}")
 
     def load_valence_arousal_adapter(self, load_path):
-        checkpoint = torch.load(load_path, map_location=next(self.parameters()).device)
+        checkpoint = torch.load(load_path, map_location=next(self.parameters()).device, weights_only=True)
         self.va_adapter.load_state_dict(checkpoint['va_adapter_state_dict'])
         print(f"Valence-arousal adapter loaded from {load_path}")
 